@@ -3,12 +3,15 @@ from __future__ import annotations
 
 import os
 import sys
+import time
+from datetime import datetime
 from typing import Dict, Any, List
 
+import httplib2
+import google_auth_httplib2
 from googleapiclient.discovery import build
 from googleapiclient.errors import HttpError
 from google.oauth2.credentials import Credentials
-from google_auth_oauthlib.flow import InstalledAppFlow
 from google.auth.transport.requests import Request
 
 # ------------------------------------------------------------
@@ -23,6 +26,9 @@ SCOPES = [
 CREDENTIALS_FILE = "credentials.json"
 TOKEN_FILE = "token.json"
 
+# Congelado uma única vez no import; usado na checagem de escopos do token
+_SCOPES_SET = frozenset(SCOPES)
+
 
 def get_credentials():
     """
@@ -33,10 +39,29 @@ def get_credentials():
     if os.path.exists(TOKEN_FILE):
         creds = Credentials.from_authorized_user_file(TOKEN_FILE, SCOPES)
 
+    # Renova proativamente tokens a menos de 5 min de expirar, evitando o
+    # ciclo 401 -> refresh -> retry no meio de uma execução longa.
+    if (
+        creds
+        and creds.valid
+        and creds.refresh_token
+        and creds.expiry
+        and (creds.expiry - datetime.utcnow()).total_seconds() < 300
+    ):
+        # Renovação oportunista: se falhar (rede fora, RefreshError), o
+        # token atual ainda vale por alguns minutos — segue com ele e
+        # deixa o caminho reativo abaixo cuidar de um token expirado.
+        try:
+            creds.refresh(Request())
+            with open(TOKEN_FILE, "w", encoding="utf-8") as f:
+                f.write(creds.to_json())
+        except Exception as e:
+            print(f"AVISO: renovação proativa do token falhou ({e}); usando o token ainda válido.")
+
     if (
         not creds
         or not creds.valid
-        or not set(SCOPES).issubset(set(creds.scopes or []))
+        or not frozenset(creds.scopes or ()).issuperset(_SCOPES_SET)
     ):
         print("\n--- Necessário re-autorizar o acesso ---")
         if creds and creds.expired and creds.refresh_token:
@@ -45,6 +70,10 @@ def get_credentials():
             if not os.path.exists(CREDENTIALS_FILE):
                 print("credentials.json não encontrado.")
                 sys.exit(1)
+            # Import tardio: o fluxo OAuth só é necessário na primeira
+            # autorização; no caminho comum o import pesado é evitado.
+            from google_auth_oauthlib.flow import InstalledAppFlow
+
             flow = InstalledAppFlow.from_client_secrets_file(CREDENTIALS_FILE, SCOPES)
             creds = flow.run_local_server(port=0)
         with open(TOKEN_FILE, "w", encoding="utf-8") as f:
@@ -63,8 +92,9 @@ def escolher_turma(classroom_service) -> Dict[str, Any]:
         resp = classroom_service.courses().list(
             pageSize=100,
             courseStates=["ACTIVE"],
-            pageToken=page_token
-        ).execute()
+            pageToken=page_token,
+            fields="nextPageToken,courses(id,name)"
+        ).execute(num_retries=5)
         cursos.extend(resp.get("courses", []))
         page_token = resp.get("nextPageToken")
         if not page_token:
@@ -91,24 +121,74 @@ def escolher_turma(classroom_service) -> Dict[str, Any]:
 # ------------------------------------------------------------
 # CLASSROOM – MAPA DE ALUNOS (email -> userId)
 # ------------------------------------------------------------
-def listar_e_baixar_alunos(classroom_service, course_id: str):
+# Limite de requisições por lote imposto pelo Google
+BATCH_LIMIT = 50
+
+
+def _executar_batch_com_backoff(batch, tentativas: int = 5) -> None:
+    """
+    Executa um BatchHttpRequest com backoff exponencial para erros
+    transitórios (429/5xx) da rodada inteira.
+
+    BatchHttpRequest.execute() não aceita num_retries, então o retry que
+    as chamadas diretas ganham do próprio cliente é feito aqui à mão.
+    Reenviar a rodada é seguro: as sub-requisições são listagens
+    idempotentes, e erros por sub-requisição chegam pelo callback.
+    """
+    for tentativa in range(tentativas):
+        try:
+            batch.execute()
+            return
+        except HttpError as e:
+            status = getattr(e.resp, "status", None)
+            if tentativa == tentativas - 1 or status not in (429, 500, 502, 503, 504):
+                raise
+            time.sleep(2 ** tentativa)
+
+
+def listar_e_baixar_alunos(classroom_service, course_ids: List[str]):
     """
-    Lista todos os alunos da turma e exibe seus detalhes.
+    Lista todos os alunos das turmas informadas e exibe seus detalhes.
+
+    Em vez de uma chamada HTTP por página, as buscas são agrupadas em um
+    BatchHttpRequest: cada rodada envia até 50 requisições de uma vez e as
+    páginas seguintes (nextPageToken) entram na rodada seguinte.
     """
     alunos: List[Dict[str, Any]] = []
-    page_token = None
 
-    try:
-        while True:
-            resp = classroom_service.courses().students().list(
-                courseId=course_id,
-                pageToken=page_token
-            ).execute()
+    # Pendências como (courseId, pageToken); None = primeira página
+    pendentes = [(cid, None) for cid in course_ids]
 
-            alunos.extend(resp.get("students", []))
-            page_token = resp.get("nextPageToken")
-            if not page_token:
-                break
+    try:
+        while pendentes:
+            proximas: List[Any] = []
+
+            def callback(request_id, response, exception):
+                if exception is not None:
+                    print(f"ERRO: Falha ao listar alunos do curso {request_id}: {exception}")
+                    return
+                alunos.extend(response.get("students", []))
+                token = response.get("nextPageToken")
+                if token:
+                    proximas.append((request_id, token))
+
+            batch = classroom_service.new_batch_http_request(callback=callback)
+            # Cada curso entra no máximo 1x por rodada, então o courseId
+            # serve de request_id único dentro do lote.
+            for cid, tok in pendentes[:BATCH_LIMIT]:
+                batch.add(
+                    classroom_service.courses().students().list(
+                        courseId=cid,
+                        pageToken=tok,
+                        pageSize=100,
+                        fields="nextPageToken,students(userId,profile(emailAddress,name/fullName))"
+                    ),
+                    request_id=cid,
+                )
+
+            restantes = pendentes[BATCH_LIMIT:]
+            _executar_batch_com_backoff(batch)
+            pendentes = restantes + proximas
 
         print(f"\n✅ Total de Alunos Carregados pela API: {len(alunos)}")
         
@@ -137,14 +217,19 @@ def main():
     print("\nEscopos do token carregado:")
     print(creds.scopes)
 
-    classroom_service = build("classroom", "v1", credentials=creds)
+    # Http compartilhado com keep-alive e respostas comprimidas (gzip);
+    # static_discovery evita o fetch do discovery document na inicialização.
+    http = google_auth_httplib2.AuthorizedHttp(creds, http=httplib2.Http())
+    classroom_service = build(
+        "classroom", "v1", http=http, static_discovery=True
+    )
 
     # Escolher turma
     curso = escolher_turma(classroom_service)
     course_id = curso["id"]
     print(f"\nTurma escolhida: {curso['name']} (ID {course_id})")
 
-    listar_e_baixar_alunos(classroom_service, course_id)
+    listar_e_baixar_alunos(classroom_service, [course_id])
     
     print("\nProcesso de listagem concluído.")
 
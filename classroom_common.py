@@ -0,0 +1,161 @@
+from __future__ import annotations
+"""
+classroom_common.py
+
+Configuração e autenticação compartilhadas pelos scripts de cursos:
+- criar_cursos_simples.py
+- criar_treinamentos_classroom.py
+- gerenciar_cursos_classroom.py
+
+Um único token.json com a UNIÃO dos escopos dos três scripts: cada sessão
+faz no máximo um refresh OAuth (em vez de um por script) e acaba o 403 de
+ACCESS_TOKEN_SCOPE_INSUFFICIENT causado por um token gerado por outro
+script com permissões a menos.
+"""
+
+import time
+from pathlib import Path
+from typing import Any, Callable, List, Optional, Tuple
+
+from google.oauth2.credentials import Credentials
+from google.auth.transport.requests import Request
+
+# União dos escopos usados pelos três scripts. Autorizar tudo de uma vez
+# evita ter que excluir o token.json ao alternar entre eles.
+SCOPES_UNION: List[str] = [
+    "https://www.googleapis.com/auth/classroom.courses",              # criar/editar/listar/arquivar cursos
+    "https://www.googleapis.com/auth/classroom.courseworkmaterials",  # criar materiais
+    "https://www.googleapis.com/auth/classroom.topics",               # criar tópicos
+    "https://www.googleapis.com/auth/drive.file",                     # enviar arquivos pro Drive
+]
+
+# Pasta onde estão credentials.json e onde será criado o token.json
+BASE_DIR = Path(r"C:\Users\Administrador\Documents\Estudos\python\treinamentos")
+CREDENTIALS_FILE = BASE_DIR / "credentials.json"
+TOKEN_FILE = BASE_DIR / "token.json"
+
+# Credenciais já resolvidas neste processo: chamadas repetidas de
+# get_credentials() (vários serviços/threads) não relêem nem re-validam
+# o token.json enquanto ele estiver válido.
+_CACHED_CREDS: Optional[Credentials] = None
+
+
+def get_credentials(scopes: List[str] = SCOPES_UNION) -> Credentials:
+    """
+    Carrega credenciais do token.json; se não existir, usa credentials.json
+    para gerar token via fluxo OAuth no navegador.
+
+    Por padrão autoriza SCOPES_UNION, então o mesmo token serve para todos
+    os scripts sem re-consentimento.
+    """
+    global _CACHED_CREDS
+    if _CACHED_CREDS is not None and _CACHED_CREDS.valid:
+        return _CACHED_CREDS
+
+    creds = None
+    if TOKEN_FILE.exists():
+        print(f"[{time.strftime('%H:%M:%S')}] Tentando carregar credenciais de {TOKEN_FILE.name}...")
+        creds = Credentials.from_authorized_user_file(str(TOKEN_FILE), scopes)
+
+    # Se não há credenciais válidas, faz login
+    if not creds or not creds.valid:
+        if creds and creds.expired and creds.refresh_token:
+            print(f"[{time.strftime('%H:%M:%S')}] Credenciais expiradas. Tentando renovar...")
+            creds.refresh(Request())
+        else:
+            print(f"[{time.strftime('%H:%M:%S')}] Credenciais inválidas ou inexistentes.")
+            print("Iniciando fluxo OAuth no navegador. Por favor, autorize.")
+            try:
+                # Import tardio: o fluxo OAuth só é necessário na primeira
+                # autorização.
+                from google_auth_oauthlib.flow import InstalledAppFlow
+
+                flow = InstalledAppFlow.from_client_secrets_file(str(CREDENTIALS_FILE), scopes)
+                creds = flow.run_local_server(port=0)
+            except FileNotFoundError:
+                print(f"\n[ERRO FATAL] Arquivo de credenciais '{CREDENTIALS_FILE.name}' não encontrado.")
+                print("Certifique-se de que o arquivo 'credentials.json' está na pasta correta.")
+                exit(1)
+            except Exception as e:
+                print(f"\n[ERRO FATAL] Falha no fluxo de autenticação: {e}")
+                exit(1)
+        # Salva o token para a próxima vez
+        with open(TOKEN_FILE, "w", encoding="utf-8") as token:
+            token.write(creds.to_json())
+        print(f"[{time.strftime('%H:%M:%S')}] Novo token salvo em {TOKEN_FILE.name}.")
+    else:
+        print(f"[{time.strftime('%H:%M:%S')}] Credenciais carregadas e válidas.")
+    _CACHED_CREDS = creds
+    return creds
+
+
+# Limite de sub-requisições por BatchHttpRequest imposto pelo Google
+BATCH_LIMIT = 50
+
+# Status HTTP que valem nova tentativa com backoff (quota/transitórios)
+_STATUS_TRANSIENTES = (429, 500, 502, 503, 504)
+
+
+def executar_batch_com_backoff(
+    service: Any,
+    requisicoes: List[Tuple[str, Any]],
+    callback: Callable[[Any, Any, Any], None],
+    tentativas: int = 5,
+) -> None:
+    """
+    Despacha 'requisicoes' — lista de (request_id, HttpRequest) — em lotes
+    de até BATCH_LIMIT, com backoff exponencial em dois níveis:
+
+    - a rodada inteira (o POST do lote) é reexecutada se falhar com
+      HttpError 429/5xx, já que BatchHttpRequest.execute() não aceita o
+      num_retries das chamadas diretas;
+    - sub-requisições que falharem com 429/5xx são recolhidas e reenviadas
+      na rodada seguinte, após a espera exponencial (um 429 significa que
+      a sub-requisição NÃO foi executada, então reenviar é seguro mesmo
+      para criações).
+
+    'callback' recebe apenas resultados finais: sucessos e erros não
+    transitórios (ou transitórios com as tentativas esgotadas).
+    """
+    # Import tardio: quem só usa get_credentials() não paga o import
+    from googleapiclient.errors import HttpError
+
+    pendentes = list(requisicoes)
+    for tentativa in range(tentativas):
+        ultima = tentativa == tentativas - 1
+        refazer: List[Tuple[str, Any]] = []
+
+        for inicio in range(0, len(pendentes), BATCH_LIMIT):
+            lote = pendentes[inicio:inicio + BATCH_LIMIT]
+            por_id = dict(lote)
+
+            def _cb(request_id, response, exception, por_id=por_id):
+                if (
+                    exception is not None
+                    and not ultima
+                    and isinstance(exception, HttpError)
+                    and getattr(exception.resp, "status", None) in _STATUS_TRANSIENTES
+                ):
+                    refazer.append((request_id, por_id[request_id]))
+                    return
+                callback(request_id, response, exception)
+
+            batch = service.new_batch_http_request(callback=_cb)
+            for request_id, requisicao in lote:
+                batch.add(requisicao, request_id=request_id)
+
+            # Backoff da rodada inteira (falha do próprio POST do lote)
+            for rodada in range(tentativas):
+                try:
+                    batch.execute()
+                    break
+                except HttpError as e:
+                    status = getattr(e.resp, "status", None)
+                    if rodada == tentativas - 1 or status not in _STATUS_TRANSIENTES:
+                        raise
+                    time.sleep(2 ** rodada)
+
+        if not refazer:
+            return
+        time.sleep(2 ** tentativa)
+        pendentes = refazer
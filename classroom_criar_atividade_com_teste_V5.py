@@ -1,15 +1,20 @@
 from __future__ import annotations
 # -*- coding: utf-8 -*-
 
+import argparse
+import json
 import os
 import sys
+from datetime import datetime
 import re
+from concurrent.futures import ThreadPoolExecutor
 from typing import List, Dict, Any, Optional
 
+import httplib2
+import google_auth_httplib2
 from googleapiclient.discovery import build
 from googleapiclient.errors import HttpError
 from google.oauth2.credentials import Credentials
-from google_auth_oauthlib.flow import InstalledAppFlow
 from google.auth.transport.requests import Request
 
 # ------------------------------------------------------------
@@ -26,6 +31,13 @@ SCOPES = [
 CREDENTIALS_FILE = "credentials.json"
 TOKEN_FILE = "token.json"
 
+# Cache da última turma/tema escolhidos, para re-execuções contra a mesma
+# turma não dependerem do menu interativo.
+ULTIMA_ESCOLHA_FILE = os.path.expanduser("~/.classroom_cli_last.json")
+
+# Congelado uma única vez no import; usado na checagem de escopos do token
+_SCOPES_SET = frozenset(SCOPES)
+
 
 def get_credentials():
     """
@@ -36,10 +48,29 @@ def get_credentials():
     if os.path.exists(TOKEN_FILE):
         creds = Credentials.from_authorized_user_file(TOKEN_FILE, SCOPES)
 
+    # Renova proativamente tokens a menos de 5 min de expirar, evitando o
+    # ciclo 401 -> refresh -> retry no meio de uma execução longa.
+    if (
+        creds
+        and creds.valid
+        and creds.refresh_token
+        and creds.expiry
+        and (creds.expiry - datetime.utcnow()).total_seconds() < 300
+    ):
+        # Renovação oportunista: se falhar (rede fora, RefreshError), o
+        # token atual ainda vale por alguns minutos — segue com ele e
+        # deixa o caminho reativo abaixo cuidar de um token expirado.
+        try:
+            creds.refresh(Request())
+            with open(TOKEN_FILE, "w", encoding="utf-8") as f:
+                f.write(creds.to_json())
+        except Exception as e:
+            print(f"AVISO: renovação proativa do token falhou ({e}); usando o token ainda válido.")
+
     if (
         not creds
         or not creds.valid
-        or not set(SCOPES).issubset(set(creds.scopes or []))
+        or not frozenset(creds.scopes or ()).issuperset(_SCOPES_SET)
     ):
         if creds and creds.expired and creds.refresh_token:
             creds.refresh(Request())
@@ -47,6 +78,10 @@ def get_credentials():
             if not os.path.exists(CREDENTIALS_FILE):
                 print("credentials.json não encontrado.")
                 sys.exit(1)
+            # Import tardio: o fluxo OAuth só é necessário na primeira
+            # autorização; no caminho comum o import pesado é evitado.
+            from google_auth_oauthlib.flow import InstalledAppFlow
+
             flow = InstalledAppFlow.from_client_secrets_file(CREDENTIALS_FILE, SCOPES)
             creds = flow.run_local_server(port=0)
         with open(TOKEN_FILE, "w", encoding="utf-8") as f:
@@ -54,10 +89,35 @@ def get_credentials():
     return creds
 
 
+# ------------------------------------------------------------
+# CACHE DA ÚLTIMA ESCOLHA (turma/tema)
+# ------------------------------------------------------------
+def carregar_ultima_escolha() -> Dict[str, Any]:
+    """
+    Lê o cache da última turma/tema escolhidos. Retorna {} se não existir.
+    """
+    try:
+        with open(ULTIMA_ESCOLHA_FILE, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def salvar_ultima_escolha(course_id: str, topic_id: Optional[str]) -> None:
+    """
+    Guarda a escolha atual para servir de padrão na próxima execução.
+    """
+    try:
+        with open(ULTIMA_ESCOLHA_FILE, "w", encoding="utf-8") as f:
+            json.dump({"course_id": course_id, "topic_id": topic_id}, f)
+    except OSError:
+        pass  # cache é conveniência; não derruba o fluxo
+
+
 # ------------------------------------------------------------
 # CLASSROOM – ESCOLHER TURMA
 # ------------------------------------------------------------
-def escolher_turma(classroom_service):
+def listar_turmas(classroom_service) -> List[Dict[str, Any]]:
     cursos: List[Dict[str, Any]] = []
     page_token = None
 
@@ -65,8 +125,9 @@ def escolher_turma(classroom_service):
         resp = classroom_service.courses().list(
             pageSize=100,
             courseStates=["ACTIVE"],
-            pageToken=page_token
-        ).execute()
+            pageToken=page_token,
+            fields="nextPageToken,courses(id,name)"
+        ).execute(num_retries=5)
         cursos.extend(resp.get("courses", []))
         page_token = resp.get("nextPageToken")
         if not page_token:
@@ -76,12 +137,23 @@ def escolher_turma(classroom_service):
         print("Nenhuma turma ativa encontrada.")
         sys.exit(0)
 
+    return cursos
+
+
+def escolher_turma(cursos: List[Dict[str, Any]], padrao_id: Optional[str] = None):
     print("\n=== TURMAS DISPONÍVEIS ===")
     for i, c in enumerate(cursos, start=1):
         print(f"{i:2d} - {c['name']} (ID {c['id']})")
 
+    padrao = next((c for c in cursos if c["id"] == padrao_id), None)
+
     while True:
-        op = input("\nEscolha o número da turma: ").strip()
+        prompt = "\nEscolha o número da turma"
+        if padrao:
+            prompt += f" (ENTER = última: {padrao['name']})"
+        op = input(prompt + ": ").strip()
+        if not op and padrao:
+            return padrao
         try:
             x = int(op)
             if 1 <= x <= len(cursos):
@@ -94,16 +166,37 @@ def escolher_turma(classroom_service):
 # ------------------------------------------------------------
 # CLASSROOM – ESCOLHER TEMA (TÓPICO) DA TURMA
 # ------------------------------------------------------------
-def escolher_tema(classroom_service, curso) -> Optional[str]:
+def _listar_temas_em_thread(creds, course_id: str) -> List[Dict[str, Any]]:
+    """
+    Busca os temas de uma turma em thread própria. httplib2.Http não é
+    thread-safe, então cada worker monta o próprio AuthorizedHttp.
+    """
+    http = google_auth_httplib2.AuthorizedHttp(creds, http=httplib2.Http())
+    service = build("classroom", "v1", http=http, static_discovery=True)
+    resp = service.courses().topics().list(
+        courseId=course_id,
+        fields="topic(topicId,name)"
+    ).execute(num_retries=5)
+    return resp.get("topic", [])
+
+
+def escolher_tema(
+    classroom_service,
+    curso,
+    padrao_id: Optional[str] = None,
+    temas: Optional[List[Dict[str, Any]]] = None,
+) -> Optional[str]:
     """
     Lista os temas (tópicos) da turma e permite escolher um.
     Retorna o topicId escolhido ou None para 'sem tema'.
+    Aceita a lista de temas pré-buscada (prefetch) para pular o fetch.
     """
-    topics_resp = classroom_service.courses().topics().list(
-        courseId=curso["id"]
-    ).execute()
-
-    temas = topics_resp.get("topic", [])
+    if temas is None:
+        topics_resp = classroom_service.courses().topics().list(
+            courseId=curso["id"],
+            fields="topic(topicId,name)"
+        ).execute(num_retries=5)
+        temas = topics_resp.get("topic", [])
 
     if not temas:
         print("\nNenhum tema cadastrado para esta turma. A atividade será criada SEM tema.")
@@ -114,8 +207,15 @@ def escolher_tema(classroom_service, curso) -> Optional[str]:
     for i, t in enumerate(temas, start=1):
         print(f"{i:2d} - {t['name']} (ID {t['topicId']})")
 
+    padrao = next((t for t in temas if t["topicId"] == padrao_id), None)
+
     while True:
-        op = input("\nEscolha o número do tema (0 para sem tema): ").strip()
+        prompt = "\nEscolha o número do tema (0 para sem tema"
+        if padrao:
+            prompt += f"; ENTER = último: {padrao['name']}"
+        op = input(prompt + "): ").strip()
+        if not op and padrao:
+            return padrao["topicId"]
         try:
             x = int(op)
             if x == 0:
@@ -130,77 +230,39 @@ def escolher_tema(classroom_service, curso) -> Optional[str]:
 # ------------------------------------------------------------
 # PARSER – FORMATO
 # ------------------------------------------------------------
+# Regexes compiladas uma única vez no import (o parser roda por linha)
+_RE_P = re.compile(r"^P\d*:", re.IGNORECASE)       # Início de pergunta: P1:, P2:, P:
+_RE_ALT = re.compile(r"([A-Z])\)\s*(.+)", re.IGNORECASE)  # Alternativa: A) ...
+_RE_G = re.compile(r"G:\s*([A-Z])", re.IGNORECASE)  # Gabarito: G: B
+
+
 def parse_bloco(bloco: str) -> List[Dict[str, Any]]:
     """
     Analisa o bloco de texto para extrair perguntas, alternativas e gabarito.
+
+    Percorre as linhas uma única vez, mantendo o estado da pergunta em
+    construção, em vez de montar uma lista intermediária de blocos e
+    re-iterar sobre ela.
     """
     texto = bloco.strip("\n")
     if not texto:
         print("Nenhum texto informado.")
         sys.exit(1)
 
-    linhas = texto.splitlines()
-
-    blocos: List[List[str]] = []
-    bloco_atual: List[str] = []
-
-    for linha in linhas:
-        s = linha.strip()
-        if not s:
-            if bloco_atual:
-                bloco_atual.append("")
-            continue
-
-        # Início de nova pergunta: P1:, P2:, P:
-        if re.match(r"^P\d*:", s, re.IGNORECASE):
-            if bloco_atual:
-                blocos.append(bloco_atual)
-
-            depois = s.split(":", 1)[1].strip() if ":" in s else ""
-            if depois:
-                bloco_atual = [depois]
-            else:
-                bloco_atual = []
-        else:
-            bloco_atual.append(linha)
-
-    if bloco_atual:
-        blocos.append(bloco_atual)
-
-    if not blocos:
-        print("ERRO: Nenhum bloco de pergunta encontrado (P1:, P2:, ...).")
-        sys.exit(1)
-
     perguntas: List[Dict[str, Any]] = []
 
-    for bloco_p in blocos:
-        linhas_p = [l.strip() for l in bloco_p if l.strip()]
-        if not linhas_p:
-            continue
+    enunciado: Optional[str] = None
+    # letra -> texto da alternativa (dict preserva a ordem de inserção)
+    alternativas: Dict[str, str] = {}
+    letra_correta: Optional[str] = None
+    em_bloco = False
+
+    def fechar_pergunta() -> None:
+        """Valida a pergunta acumulada e adiciona a 'perguntas'."""
+        if not em_bloco or enunciado is None:
+            return
 
-        enunciado = linhas_p[0]
-
-        alternativas_textos: List[str] = []
-        alternativas_letras: List[str] = []
-        letra_correta: Optional[str] = None
-
-        for l in linhas_p[1:]:
-            # Alternativas: A) ..., B) ..., etc.
-            m_alt = re.match(r"([A-Z])\)\s*(.+)", l, re.IGNORECASE)
-            if m_alt:
-                letra = m_alt.group(1).lower()
-                texto_alt = m_alt.group(2).strip()
-                alternativas_letras.append(letra)
-                alternativas_textos.append(texto_alt)
-                continue
-
-            # Gabarito: G: B
-            m_g = re.match(r"G:\s*([A-Z])", l, re.IGNORECASE)
-            if m_g:
-                letra_correta = m_g.group(1).lower()
-                continue
-
-        if len(alternativas_textos) < 2:
+        if len(alternativas) < 2:
             print(f"ERRO: pergunta sem alternativas suficientes -> {enunciado}")
             sys.exit(1)
 
@@ -208,25 +270,64 @@ def parse_bloco(bloco: str) -> List[Dict[str, Any]]:
             print(f"ERRO: pergunta sem gabarito (linha 'G: X') -> {enunciado}")
             sys.exit(1)
 
-        if letra_correta not in alternativas_letras:
+        if letra_correta not in alternativas:
             print(
                 f"ERRO: gabarito '{letra_correta.upper()}' não corresponde a "
                 f"nenhuma alternativa em -> {enunciado}"
             )
             sys.exit(1)
 
-        idx_correta = alternativas_letras.index(letra_correta)
-
         perguntas.append(
             {
                 "title": enunciado,
-                "alternativas": alternativas_textos,
-                "correta_idx": idx_correta,
+                "alternativas": list(alternativas.values()),
+                "correta": alternativas[letra_correta],
             }
         )
 
+    for linha in texto.splitlines():
+        s = linha.strip()
+        if not s:
+            continue
+
+        # Início de nova pergunta: P1:, P2:, P:
+        if _RE_P.match(s):
+            fechar_pergunta()
+            em_bloco = True
+            depois = s.split(":", 1)[1].strip()
+            enunciado = depois or None
+            alternativas = {}
+            letra_correta = None
+            continue
+
+        # Linhas antes do primeiro "P:" iniciam um bloco implícito
+        if not em_bloco:
+            em_bloco = True
+            enunciado = s
+            alternativas = {}
+            letra_correta = None
+            continue
+
+        # Primeira linha após um "P1:" sem texto vira o enunciado
+        if enunciado is None:
+            enunciado = s
+            continue
+
+        # Alternativas: A) ..., B) ..., etc.
+        m_alt = _RE_ALT.match(s)
+        if m_alt:
+            alternativas[m_alt.group(1).lower()] = m_alt.group(2).strip()
+            continue
+
+        # Gabarito: G: B
+        m_g = _RE_G.match(s)
+        if m_g:
+            letra_correta = m_g.group(1).lower()
+
+    fechar_pergunta()
+
     if not perguntas:
-        print("ERRO: não consegui montar nenhuma pergunta.")
+        print("ERRO: Nenhum bloco de pergunta encontrado (P1:, P2:, ...).")
         sys.exit(1)
 
     return perguntas
@@ -235,19 +336,51 @@ def parse_bloco(bloco: str) -> List[Dict[str, Any]]:
 # ------------------------------------------------------------
 # FORMS – CRIAR QUIZ (coletando e-mail) E LIBERAR ACESSO
 # ------------------------------------------------------------
+# Máximo de operações por batchUpdate; evita estourar o limite de tamanho
+# da requisição em quizzes muito grandes.
+FORMS_BATCH_CHUNK = 50
+
+
+def _montar_item_pergunta(q: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Monta o item (createItem.item) de uma pergunta para o batchUpdate do Forms.
+    """
+    return {
+        "title": q["title"],
+        "questionItem": {
+            "question": {
+                "required": True,
+                "choiceQuestion": {
+                    "type": "RADIO",
+                    "options": [{"value": a} for a in q["alternativas"]],
+                    "shuffle": False,
+                },
+                "grading": {
+                    "pointValue": 1,
+                    "correctAnswers": {"answers": [{"value": q["correta"]}]},
+                },
+            }
+        },
+    }
+
+
 def criar_quiz_forms(forms_service, drive_service, titulo, questoes):
     """
     Cria um Forms como QUIZ, coletando e-mail do respondente,
     adiciona as questões com gabarito E DEFINE PERMISSÃO DE ACESSO PÚBLICO.
     Retorna (form_id, responder_uri).
     """
+    # O create precisa ser síncrono: todas as chamadas seguintes dependem
+    # do formId retornado.
     form = forms_service.forms().create(
         body={"info": {"title": titulo}}
-    ).execute()
+    ).execute(num_retries=5)
 
     form_id = form["formId"]
-    
+
     # === LIBERAR PARA TODOS COM LINK (Drive API) ===
+    # Fica fora do lote do Forms: desde a descontinuação do endpoint
+    # /batch global, cada BatchHttpRequest só aceita chamadas de uma API.
     try:
         drive_service.permissions().create(
             fileId=form_id,
@@ -256,7 +389,7 @@ def criar_quiz_forms(forms_service, drive_service, titulo, questoes):
                 "role": "reader",
             },
             fields="id",
-        ).execute()
+        ).execute(num_retries=5)
         print("Permissão de acesso ao Forms definida para 'Qualquer pessoa com o link'.")
     except HttpError as e:
         print(f"ATENÇÃO: Não foi possível definir permissão pública do Drive. Verifique a configuração do seu domínio ou faça manualmente: {e}")
@@ -272,43 +405,30 @@ def criar_quiz_forms(forms_service, drive_service, titulo, questoes):
                 "updateMask": "quizSettings.isQuiz,emailCollectionType",
             }
         }
-    ]
-
-    for i, q in enumerate(questoes):
-        alternativas = q["alternativas"]
-        correta = alternativas[q["correta_idx"]]
-
-        item = {
-            "title": q["title"],
-            "questionItem": {
-                "question": {
-                    "required": True,
-                    "choiceQuestion": {
-                        "type": "RADIO",
-                        "options": [{"value": a} for a in alternativas],
-                        "shuffle": False,
-                    },
-                    "grading": {
-                        "pointValue": 1,
-                        "correctAnswers": {"answers": [{"value": correta}]},
-                    },
-                }
-            },
-        }
-
-        requests.append({
+    ] + [
+        {
             "createItem": {
-                "item": item,
-                "location": {"index": i}
+                "item": _montar_item_pergunta(q),
+                "location": {"index": i},
             }
-        })
-
-    forms_service.forms().batchUpdate(
-        formId=form_id, body={"requests": requests}
-    ).execute()
+        }
+        for i, q in enumerate(questoes)
+    ]
 
-    form_final = forms_service.forms().get(formId=form_id).execute()
-    responder_uri = form_final.get("responderUri")
+    # Envia em blocos: a operação de settings vai no primeiro e os
+    # location.index são absolutos, então blocos seguintes continuam
+    # preenchendo as posições corretas.
+    for inicio in range(0, len(requests), FORMS_BATCH_CHUNK):
+        forms_service.forms().batchUpdate(
+            formId=form_id,
+            body={"requests": requests[inicio:inicio + FORMS_BATCH_CHUNK]},
+        ).execute(num_retries=5)
+
+    # O responderUri já vem na resposta do create; não precisa de um
+    # forms.get extra só para buscá-lo.
+    responder_uri = form.get("responderUri")
+    if not responder_uri:
+        responder_uri = f"https://docs.google.com/forms/d/{form_id}/viewform"
 
     print("\nForm criado com sucesso.")
     print("Link para responder:", responder_uri)
@@ -353,7 +473,7 @@ def criar_atividade_classroom(
         classroom_service.courses()
         .courseWork()
         .create(courseId=curso["id"], body=body)
-        .execute()
+        .execute(num_retries=5)
     )
     print(f"Tarefa criada no Classroom (ID: {trabalho['id']}).")
     return trabalho["id"]
@@ -363,18 +483,84 @@ def criar_atividade_classroom(
 # MAIN
 # ------------------------------------------------------------
 def main():
+    parser = argparse.ArgumentParser(
+        description="Cria um quiz no Google Forms e a atividade no Classroom."
+    )
+    parser.add_argument("--course-id", help="ID da turma (pula o menu de turmas).")
+    parser.add_argument("--topic-id", help="ID do tema (pula o menu de temas).")
+    parser.add_argument("--titulo", help="Título da avaliação.")
+    parser.add_argument(
+        "--bloco-file",
+        help="Arquivo texto com as perguntas (em vez de colar no terminal).",
+    )
+    args = parser.parse_args()
+
     creds = get_credentials()
     print("Escopos do token carregado:")
     print(creds.scopes)
 
-    classroom_service = build("classroom", "v1", credentials=creds)
-    forms_service = build("forms", "v1", credentials=creds)
-    drive_service = build("drive", "v3", credentials=creds) 
+    # Um único Http autenticado para os três serviços: a conexão TLS com
+    # *.googleapis.com é reaproveitada em vez de um handshake por serviço.
+    # static_discovery=True usa os discovery documents empacotados no
+    # cliente, evitando 3 fetches HTTP na inicialização.
+    http = google_auth_httplib2.AuthorizedHttp(creds, http=httplib2.Http())
+    classroom_service = build("classroom", "v1", http=http, static_discovery=True)
+    forms_service = build("forms", "v1", http=http, static_discovery=True)
+    drive_service = build("drive", "v3", http=http, static_discovery=True)
+
+    ultima = carregar_ultima_escolha()
+
+    temas_prontos: Optional[List[Dict[str, Any]]] = None
+
+    if args.course_id:
+        turma = classroom_service.courses().get(
+            id=args.course_id, fields="id,name"
+        ).execute(num_retries=5)
+    else:
+        cursos = listar_turmas(classroom_service)
+
+        # Pré-busca os temas de cada turma em background: o RTT do
+        # topics.list fica escondido atrás do tempo de escolha no menu.
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            topics_futures = {
+                c["id"]: executor.submit(_listar_temas_em_thread, creds, c["id"])
+                for c in cursos
+            }
+            turma = escolher_turma(cursos, padrao_id=ultima.get("course_id"))
+
+            fut = topics_futures.get(turma["id"])
+            if fut is not None:
+                try:
+                    temas_prontos = fut.result()
+                except Exception:
+                    temas_prontos = None  # cai no fetch síncrono do escolher_tema
+
+            for outro in topics_futures.values():
+                outro.cancel()
+
+    if args.topic_id:
+        topic_id: Optional[str] = args.topic_id
+    else:
+        topic_id = escolher_tema(
+            classroom_service,
+            turma,
+            padrao_id=ultima.get("topic_id"),
+            temas=temas_prontos,
+        )
+
+    salvar_ultima_escolha(turma["id"], topic_id)
 
-    turma = escolher_turma(classroom_service)
-    topic_id = escolher_tema(classroom_service, turma)
+    titulo = args.titulo or input("\nTítulo da avaliação: ").strip() or "Avaliação"
 
-    titulo = input("\nTítulo da avaliação: ").strip() or "Avaliação"
+    if args.bloco_file:
+        with open(args.bloco_file, "r", encoding="utf-8") as f:
+            bloco = f.read()
+        questoes = parse_bloco(bloco)
+        _executar_criacao(
+            classroom_service, forms_service, drive_service,
+            turma, topic_id, titulo, questoes,
+        )
+        return
 
     print("\nCole TODAS as perguntas, alternativas e o gabarito no formato:")
     print("P1: Pergunta")
@@ -386,26 +572,38 @@ def main():
     print("G: B   (gabarito da questão)")
     print("P2: ...")
     print("...")
-    print("\nQuando terminar de colar, digite UMA LINHA SÓ com: fim")
-    print("e pressione ENTER.\n")
+    print("\nQuando terminar de colar, pressione Ctrl-D (Linux/Mac)")
+    print("ou Ctrl-Z seguido de ENTER (Windows).\n")
 
-    linhas_bloco = []
-    while True:
-        try:
-            linha = input()
-        except EOFError:
-            break
-        if linha.strip().lower() == "fim":
-            break
-        linhas_bloco.append(linha)
+    # Lê o bloco inteiro em uma chamada só (até EOF), em vez de um input()
+    # por linha com checagem do sentinela a cada iteração.
+    bloco = sys.stdin.read()
 
-    bloco = "\n".join(linhas_bloco)
+    # Compatibilidade com o formato antigo: uma linha só com "fim"
+    # ainda é aceita como fim do bloco.
+    m_fim = re.search(r"^\s*fim\s*$", bloco, re.IGNORECASE | re.MULTILINE)
+    if m_fim:
+        bloco = bloco[:m_fim.start()]
 
     questoes = parse_bloco(bloco)
+    _executar_criacao(
+        classroom_service, forms_service, drive_service,
+        turma, topic_id, titulo, questoes,
+    )
+
 
+def _executar_criacao(
+    classroom_service,
+    forms_service,
+    drive_service,
+    turma,
+    topic_id: Optional[str],
+    titulo: str,
+    questoes: List[Dict[str, Any]],
+) -> None:
     # 1. Cria o Form e libera o acesso (form_id e link são retornados)
-    form_id, link = criar_quiz_forms(forms_service, drive_service, titulo, questoes) 
-    
+    form_id, link = criar_quiz_forms(forms_service, drive_service, titulo, questoes)
+
     # 2. Cria a atividade no Classroom com o link
     coursework_id = criar_atividade_classroom(
         classroom_service, turma, titulo, link, topic_id # REVERTIDO: Passando link
@@ -25,59 +25,34 @@ courseState	Estado da turma	Não	ACTIVE (padrão)
 
 """
 
-import time
-from pathlib import Path
-from typing import Any
+import argparse
+import csv
+from typing import Any, Dict, List
 
+import httplib2
+import google_auth_httplib2
 from googleapiclient.discovery import build
 from googleapiclient.errors import HttpError
-from google.oauth2.credentials import Credentials
-from google_auth_oauthlib.flow import InstalledAppFlow
-from google.auth.transport.requests import Request
-
-# ============================================================
-# CONFIGURAÇÕES
-# ============================================================
-
-SCOPES = [
-    "https://www.googleapis.com/auth/classroom.courses",  # criar/editar/listar cursos
-]
-
-BASE_DIR = Path(r"C:\Users\Administrador\Documents\Estudos\python\treinamentos")
-CREDENTIALS_FILE = BASE_DIR / "credentials.json"
-TOKEN_FILE = BASE_DIR / "token_cursos.json"  # token separado só para este script (opcional)
 
+from classroom_common import executar_batch_com_backoff, get_credentials
 
 # ============================================================
-# AUTENTICAÇÃO
+# CONFIGURAÇÕES / AUTENTICAÇÃO
 # ============================================================
 
-def get_credentials() -> Credentials:
-    creds = None
-    if TOKEN_FILE.exists():
-        print(f"[{time.strftime('%H:%M:%S')}] Tentando carregar token existente ({TOKEN_FILE.name})...")
-        creds = Credentials.from_authorized_user_file(str(TOKEN_FILE), SCOPES)
-
-    if not creds or not creds.valid:
-        if creds and creds.expired and creds.refresh_token:
-            print(f"[{time.strftime('%H:%M:%S')}] Token expirado. Renovando...")
-            creds.refresh(Request())
-        else:
-            print(f"[{time.strftime('%H:%M:%S')}] Criando novo token via OAuth...")
-            flow = InstalledAppFlow.from_client_secrets_file(str(CREDENTIALS_FILE), SCOPES)
-            creds = flow.run_local_server(port=0)
-            with open(TOKEN_FILE, "w", encoding="utf-8") as token:
-                token.write(creds.to_json())
-            print(f"[{time.strftime('%H:%M:%S')}] Novo token salvo em {TOKEN_FILE.name}.")
-    else:
-        print(f"[{time.strftime('%H:%M:%S')}] Token válido carregado.")
-
-    return creds
+# Escopos, credentials.json e token.json vêm de classroom_common.py: o
+# token_cursos.json separado deste script foi aposentado — agora todos os
+# scripts compartilham o mesmo token.json com a união dos escopos.
 
 
 def get_classroom_service() -> Any:
     creds = get_credentials()
-    service = build("classroom", "v1", credentials=creds)
+    # Http autenticado único: criações consecutivas de curso reutilizam a
+    # mesma conexão TLS.
+    http = google_auth_httplib2.AuthorizedHttp(creds, http=httplib2.Http(timeout=30))
+    # static_discovery usa o discovery document embutido no pacote, sem o
+    # fetch HTTPS do documento na inicialização.
+    service = build("classroom", "v1", http=http, static_discovery=True)
     return service
 
 
@@ -85,14 +60,13 @@ def get_classroom_service() -> Any:
 # FUNÇÃO PARA CRIAR CURSO
 # ============================================================
 
-def criar_curso(
-    service: Any,
+def montar_body(
     name: str,
     section: str = "",
     room: str = "",
     description: str = "",
     state: str = "ACTIVE",
-) -> None:
+) -> Dict[str, Any]:
     body = {
         "name": name,
         "ownerId": "me",          # usuário autenticado será o dono
@@ -104,9 +78,24 @@ def criar_curso(
         body["room"] = room
     if description:
         body["descriptionHeading"] = description  # aparece no topo do curso
+    return body
+
+
+def criar_curso(
+    service: Any,
+    name: str,
+    section: str = "",
+    room: str = "",
+    description: str = "",
+    state: str = "ACTIVE",
+) -> None:
+    body = montar_body(name, section, room, description, state)
 
     try:
-        course = service.courses().create(body=body).execute()
+        course = service.courses().create(
+            body=body,
+            fields="id,name,section,room,enrollmentCode",
+        ).execute(num_retries=5)
         cid = course["id"]
         code = course.get("enrollmentCode", "(sem código)")
         print(f"\n[SUCESSO] Curso criado:")
@@ -121,16 +110,64 @@ def criar_curso(
 
 
 # ============================================================
-# MODO INTERATIVO
+# MODO EM LOTE (CSV)
 # ============================================================
 
-def main():
-    print("============================================")
-    print("   CRIADOR SIMPLES DE CURSOS - CLASSROOM    ")
-    print("============================================")
+def criar_cursos_em_lote(service: Any, linhas: List[Dict[str, str]]) -> None:
+    """
+    Cria todos os cursos das linhas do CSV em lotes (BatchHttpRequest):
+    N criações viram ~1 requisição HTTPS por lote de 50, em vez de uma
+    por curso digitado. As rodadas e as sub-requisições com 429/5xx são
+    reenviadas com backoff exponencial pelo helper compartilhado.
+    """
+
+    def _on_created(request_id, response, exception):
+        if exception is not None:
+            print(f"[ERRO] Falha ao criar curso '{request_id}': {exception}")
+            return
+        code = response.get("enrollmentCode", "(sem código)")
+        print(f"[SUCESSO] Curso criado: {response['name']} (id={response['id']}, código de ingresso: {code})")
+
+    requisicoes = []
+    for i, linha in enumerate(linhas, start=1):
+        body = montar_body(
+            name=linha["name"].strip(),
+            section=(linha.get("section") or "").strip(),
+            room=(linha.get("room") or "").strip(),
+            description=(linha.get("description") or "").strip(),
+        )
+        requisicoes.append((
+            # linha do CSV + nome: único mesmo com nomes repetidos
+            f"linha {i}: {body['name']}",
+            service.courses().create(
+                body=body,
+                fields="id,name,enrollmentCode",
+            ),
+        ))
+    executar_batch_com_backoff(service, requisicoes, _on_created)
 
-    service = get_classroom_service()
 
+# ============================================================
+# MODO INTERATIVO / CLI
+# ============================================================
+
+def montar_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        description="Cria cursos (turmas) no Google Classroom.",
+    )
+    parser.add_argument(
+        "--from-csv",
+        dest="from_csv",
+        help="CSV com colunas name,section,room,description; cria todos os cursos em lote",
+    )
+    parser.add_argument("--name", help="nome do curso (modo de curso único, sem interação)")
+    parser.add_argument("--section", default="", help="seção (ex: Frascominas - Produção PET)")
+    parser.add_argument("--room", default="", help="sala (ex: Sala 1, Online, Turno A)")
+    parser.add_argument("--description", default="", help="descrição curta")
+    return parser
+
+
+def modo_interativo(service: Any) -> None:
     while True:
         print("\nInforme os dados do novo curso.")
         print("Deixe o NOME em branco para encerrar.\n")
@@ -156,6 +193,35 @@ def main():
         if continuar != "s":
             break
 
+
+def main():
+    args = montar_parser().parse_args()
+
+    print("============================================")
+    print("   CRIADOR SIMPLES DE CURSOS - CLASSROOM    ")
+    print("============================================")
+
+    service = get_classroom_service()
+
+    if args.from_csv:
+        with open(args.from_csv, newline="", encoding="utf-8") as f:
+            linhas = [l for l in csv.DictReader(f) if (l.get("name") or "").strip()]
+        if not linhas:
+            print(f"[ERRO] Nenhuma linha com 'name' preenchido em {args.from_csv}.")
+            return
+        criar_cursos_em_lote(service, linhas)
+    elif args.name:
+        criar_curso(
+            service,
+            name=args.name,
+            section=args.section,
+            room=args.room,
+            description=args.description,
+        )
+    else:
+        # Sem argumentos, mantém o modo interativo original
+        modo_interativo(service)
+
     print("\nFim do processo. Verifique os cursos em https://classroom.google.com")
 
 
@@ -20,99 +20,68 @@ from __future__ import annotations
 # - pip install google-api-python-client google-auth-httplib2 google-auth-oauthlib
 # """
 
+import argparse
+import hashlib
+import io
+import json
+import logging
+import mmap
 import os
-import time
+import sys
+import threading
+import unicodedata
+from concurrent.futures import Future, ThreadPoolExecutor, as_completed
 from pathlib import Path
-from typing import Dict, Any, List, Tuple
+from typing import Dict, Any, List, Optional, Tuple
 
 from googleapiclient.discovery import build
-from googleapiclient.http import MediaFileUpload
+from googleapiclient.http import MediaFileUpload, MediaIoBaseUpload
 from googleapiclient.errors import HttpError
 from google.oauth2.credentials import Credentials
-from google_auth_oauthlib.flow import InstalledAppFlow
-from google.auth.transport.requests import Request
+
+from classroom_common import BASE_DIR, executar_batch_com_backoff, get_credentials
 
 # ============================================================
 # 1) CONFIGURAÇÕES GERAIS
 # ============================================================
 
-# Escopos: Classroom (criar cursos, materiais, tópicos) + Drive (upload arquivos)
-SCOPES = [
-    "https://www.googleapis.com/auth/classroom.courses",              # criar/editar cursos
-    "https://www.googleapis.com/auth/classroom.courseworkmaterials", # criar materiais
-    "https://www.googleapis.com/auth/classroom.topics",              # criar tópicos (CAUSA DO ERRO 403)
-    "https://www.googleapis.com/auth/drive.file",                    # enviar arquivos pro Drive
-]
-
-
-# Pasta onde estão credentials.json e onde será criado o token.json
-BASE_DIR = Path(r"C:\Users\Administrador\Documents\Estudos\python\treinamentos")
+# Escopos, credentials.json e token.json ficam em classroom_common.py,
+# compartilhados com os demais scripts (um único token com a união dos
+# escopos = um refresh por sessão e sem 403 de escopo entre scripts).
 
 # Pasta onde estão os módulos DOCX
 MODULOS_DIR = Path(
     r"C:\Users\Administrador\Documents\Empresas\Frascominas\RH\Treinamentos\MODULOS"
 )
 
-CREDENTIALS_FILE = BASE_DIR / "credentials.json"
-TOKEN_FILE = BASE_DIR / "token.json"
-
 # Opcional: id de uma pasta específica no Drive para guardar os DOCX.
 # Se deixar como None, os arquivos irão para o "Meu Drive" raiz.
 DRIVE_FOLDER_ID = None  # ex: "1AbCdEfG..."
 
+# Logging com %(asctime)s no formatter: o timestamp é formatado de forma
+# tardia pelo próprio logging (uma vez por registro emitido), em vez de um
+# time.strftime por print — relevante com lotes e uploads em paralelo.
+# TREINAMENTOS_DEBUG=1 habilita os logs por-arquivo (nível DEBUG).
+logging.basicConfig(
+    level=logging.DEBUG if os.environ.get("TREINAMENTOS_DEBUG") else logging.INFO,
+    format="[%(asctime)s] %(message)s",
+    datefmt="%H:%M:%S",
+)
+log = logging.getLogger(__name__)
 
-# ============================================================
-# 2) AUTENTICAÇÃO GOOGLE
-# ============================================================
+# Metadado de 'parents' resolvido uma vez no import: o if por upload some
+# e o mesmo dict é reaproveitado por todos os workers (só leitura).
+_PARENTS_META = {"parents": [DRIVE_FOLDER_ID]} if DRIVE_FOLDER_ID else {}
 
-def get_credentials() -> Credentials:
-    """
-    Carrega credenciais do token.json; se não existir, usa credentials.json
-    para gerar token via fluxo OAuth no navegador.
+# Cache de uploads já feitos: sha256 do conteúdo -> fileId no Drive.
+# Em re-execuções (comum durante depuração) a fase de upload é pulada
+# inteira em vez de duplicar os arquivos no Drive.
+CACHE_FILE = BASE_DIR / "uploaded_cache.json"
 
-    Se o escopo for alterado, o 'token.json' deve ser deletado para forçar
-    o consentimento com as novas permissões.
-    """
-    creds = None
-    if TOKEN_FILE.exists():
-        print(f"[{time.strftime('%H:%M:%S')}] Tentando carregar credenciais de {TOKEN_FILE.name}...")
-        creds = Credentials.from_authorized_user_file(str(TOKEN_FILE), SCOPES)
-    # Se não há credenciais válidas, faz login
-    if not creds or not creds.valid:
-        if creds and creds.expired and creds.refresh_token:
-            print(f"[{time.strftime('%H:%M:%S')}] Credenciais expiradas. Tentando renovar...")
-            creds.refresh(Request())
-        else:
-            print(f"[{time.strftime('%H:%M:%S')}] Credenciais inválidas ou inexistentes.")
-            print("Iniciando fluxo OAuth no navegador. Por favor, autorize.")
-            try:
-                flow = InstalledAppFlow.from_client_secrets_file(str(CREDENTIALS_FILE), SCOPES)
-                creds = flow.run_local_server(port=0)
-            except FileNotFoundError:
-                print(f"\n[ERRO FATAL] Arquivo de credenciais '{CREDENTIALS_FILE.name}' não encontrado.")
-                print("Certifique-se de que o arquivo 'credentials.json' está na pasta correta.")
-                exit(1)
-            except Exception as e:
-                print(f"\n[ERRO FATAL] Falha no fluxo de autenticação: {e}")
-                exit(1)
-        # Salva o token para a próxima vez
-        with open(TOKEN_FILE, "w", encoding="utf-8") as token:
-            token.write(creds.to_json())
-        print(f"[{time.strftime('%H:%M:%S')}] Novo token salvo em {TOKEN_FILE.name}.")
-    else:
-         print(f"[{time.strftime('%H:%M:%S')}] Credenciais carregadas e válidas.")
-    return creds
-
-
-def get_services() -> Tuple[Any, Any]:
-    """
-    Retorna (classroom_service, drive_service).
-    """
-    creds = get_credentials()
-    classroom_service = build("classroom", "v1", credentials=creds)
-    drive_service = build("drive", "v3", credentials=creds)
-    return classroom_service, drive_service
 
+# ============================================================
+# 2) AUTENTICAÇÃO GOOGLE
+# ============================================================
 
 # ============================================================
 # 3) ESTRUTURA DOS CURSOS / TÓPICOS / MATERIAIS (MANTIDA)
@@ -316,33 +285,197 @@ COURSES_STRUCTURE: List[Dict[str, Any]] = [
 # 4) FUNÇÕES AUXILIARES: DRIVE E CLASSROOM
 # ============================================================
 
+# Cursos processados em paralelo: os itens de COURSES_STRUCTURE são
+# independentes entre si, então o tempo total tende ao do curso mais
+# lento em vez da soma de todos.
+COURSE_WORKERS = 4
+
+# Workers simultâneos de upload: mantém o consumo abaixo do limite de
+# ~100 requisições/100s do Drive por usuário.
+UPLOAD_WORKERS = 10
+
+# Acima deste tamanho o upload vira resumable (sessão + PUTs por chunk)
+RESUMABLE_THRESHOLD_BYTES = 5 * 1024 * 1024
+
+# MIME type dos módulos DOCX, resolvido uma vez no import
+MIME_DOCX = "application/vnd.openxmlformats-officedocument.wordprocessingml.document"
+
+_thread_local = threading.local()
+
+# Protege o dict do cache e a escrita do uploaded_cache.json, já que os
+# workers de upload rodam em paralelo.
+_cache_lock = threading.Lock()
+
+
+def carregar_cache_uploads() -> Dict[str, str]:
+    """
+    Carrega o uploaded_cache.json (sha256 -> fileId). Cache ausente ou
+    corrompido vira dict vazio: no pior caso os arquivos sobem de novo.
+    """
+    if CACHE_FILE.exists():
+        try:
+            return json.loads(CACHE_FILE.read_text(encoding="utf-8") or "{}")
+        except (json.JSONDecodeError, OSError) as e:
+            log.warning("[AVISO] Cache de uploads ilegível (%s); recomeçando do zero.", e)
+    return {}
+
+
+def _salvar_cache_uploads(cache: Dict[str, str]) -> None:
+    CACHE_FILE.write_text(json.dumps(cache, indent=2), encoding="utf-8")
+
+
+def _buscar_no_drive_por_md5(drive_service, nome: str, conteudo: bytes) -> Optional[str]:
+    """
+    Recuperação quando o cache local se perdeu: procura no Drive um
+    arquivo de mesmo nome cujo md5Checksum bata com o conteúdo local.
+    """
+    md5 = hashlib.md5(conteudo).hexdigest()
+    nome_escapado = nome.replace("'", "\\'")
+    try:
+        resp = drive_service.files().list(
+            q=f"name='{nome_escapado}' and trashed=false",
+            fields="files(id,md5Checksum)",
+        ).execute(num_retries=5)
+    except HttpError as err:
+        log.warning("[DRIVE] AVISO: busca por duplicata de %s falhou: %s", nome, err)
+        return None
+    for f in resp.get("files", []):
+        if f.get("md5Checksum") == md5:
+            return f["id"]
+    return None
+
+
+def _drive_service_da_thread(creds: Credentials) -> Any:
+    """
+    Retorna um drive_service exclusivo da thread atual.
+
+    Os objetos HTTP do googleapiclient (httplib2) NÃO são thread-safe;
+    cada worker do pool constrói e reaproveita o seu próprio serviço.
+    """
+    if getattr(_thread_local, "drive_service", None) is None:
+        # static_discovery usa o discovery document embutido no pacote,
+        # sem o fetch HTTPS do documento na construção do serviço.
+        _thread_local.drive_service = build(
+            "drive", "v3", credentials=creds, static_discovery=True
+        )
+    return _thread_local.drive_service
+
+
+def _classroom_service_da_thread(creds: Credentials) -> Any:
+    """
+    Idem para o classroom_service, usado pelas threads de curso.
+    """
+    if getattr(_thread_local, "classroom_service", None) is None:
+        _thread_local.classroom_service = build(
+            "classroom", "v1", credentials=creds, static_discovery=True
+        )
+    return _thread_local.classroom_service
+
+
+def _upload_em_thread(
+    creds: Credentials,
+    local_path: Path,
+    cache: Dict[str, str],
+    seen: Dict[Path, Any],
+) -> str:
+    """
+    Versão de upload_to_drive para uso dentro do ThreadPoolExecutor,
+    com idempotência: se o mesmo caminho já subiu nesta execução ('seen'),
+    ou o sha256 do arquivo já está no cache persistente (ou o arquivo já
+    existe no Drive com o mesmo md5), reaproveita o fileId.
+
+    'seen' guarda o fileId resolvido OU um Future de reserva: o caminho é
+    reservado sob o lock ANTES do upload, então duas threads de curso que
+    referenciam o mesmo DOCX nunca sobem o arquivo duas vezes — a segunda
+    espera o resultado da primeira em vez de também dar miss (a corrida
+    check-then-act que existia antes).
+    """
+    # Dedupe dentro da execução: se o mesmo DOCX aparece em mais de um
+    # curso, só a primeira referência paga leitura, hash e upload.
+    with _cache_lock:
+        entrada = seen.get(local_path)
+        if entrada is None:
+            reserva: Future = Future()
+            seen[local_path] = reserva
+
+    if entrada is not None:
+        if isinstance(entrada, Future):
+            # Outra thread está subindo este caminho agora; espera por ela
+            file_id = entrada.result()
+        else:
+            file_id = entrada
+        log.debug("[DRIVE] Upload pulado (mesma execução): %s -> id=%s", local_path.name, file_id)
+        return file_id
+
+    try:
+        drive_service = _drive_service_da_thread(creds)
+        conteudo = local_path.read_bytes()
+        digest = hashlib.sha256(conteudo).hexdigest()
+
+        with _cache_lock:
+            file_id = cache.get(digest)
+        if file_id:
+            log.debug("[DRIVE] Upload pulado (cache): %s -> id=%s", local_path.name, file_id)
+        else:
+            file_id = _buscar_no_drive_por_md5(drive_service, local_path.name, conteudo)
+            if file_id:
+                log.debug("[DRIVE] Upload pulado (já no Drive): %s -> id=%s", local_path.name, file_id)
+            else:
+                file_id = upload_to_drive(drive_service, local_path)
+    except BaseException as e:
+        # Desfaz a reserva e acorda quem espera: a exceção propaga também
+        # para as threads paradas no result().
+        with _cache_lock:
+            seen.pop(local_path, None)
+        reserva.set_exception(e)
+        raise
+
+    # Persiste a cada upload: uma falha no meio do lote não perde o que
+    # já subiu.
+    with _cache_lock:
+        seen[local_path] = file_id
+        cache[digest] = file_id
+        _salvar_cache_uploads(cache)
+    reserva.set_result(file_id)
+    return file_id
+
+
 def upload_to_drive(drive_service, local_path: Path) -> str:
     """
     Faz upload de um arquivo local ao Google Drive e retorna o fileId.
     """
-    file_metadata = {"name": local_path.name}
-    if DRIVE_FOLDER_ID:
-        file_metadata["parents"] = [DRIVE_FOLDER_ID]
-
-    media = MediaFileUpload(
-        str(local_path),
-        mimetype=(
-            "application/vnd.openxmlformats-officedocument.wordprocessingml.document"
-        ),
-        resumable=True,
-    )
+    file_metadata = {"name": local_path.name, **_PARENTS_META}
 
     try:
-        file = (
-            drive_service.files()
-            .create(body=file_metadata, media_body=media, fields="id")
-            .execute()
-        )
+        # Upload resumable só compensa para arquivos grandes: ele custa um
+        # round-trip extra de abertura de sessão. Os DOCX dos módulos têm
+        # poucas centenas de KB, então abaixo do limiar vai em multipart
+        # single-shot (1 requisição), lendo via mmap: o kernel mapeia o
+        # arquivo uma vez, sem o buffering de leitura do MediaFileUpload.
+        if local_path.stat().st_size > RESUMABLE_THRESHOLD_BYTES:
+            media = MediaFileUpload(str(local_path), mimetype=MIME_DOCX, resumable=True)
+            file = (
+                drive_service.files()
+                .create(body=file_metadata, media_body=media, fields="id")
+                .execute(num_retries=5)
+            )
+        else:
+            with open(local_path, "rb") as f, mmap.mmap(
+                f.fileno(), 0, access=mmap.ACCESS_READ
+            ) as mm:
+                media = MediaIoBaseUpload(
+                    io.BytesIO(mm[:]), mimetype=MIME_DOCX, resumable=False
+                )
+                file = (
+                    drive_service.files()
+                    .create(body=file_metadata, media_body=media, fields="id")
+                    .execute(num_retries=5)
+                )
         file_id = file["id"]
-        print(f"[{time.strftime('%H:%M:%S')}] [DRIVE] Upload concluído: {local_path.name} -> id={file_id}")
+        log.debug("[DRIVE] Upload concluído: %s -> id=%s", local_path.name, file_id)
         return file_id
     except HttpError as err:
-        print(f"[{time.strftime('%H:%M:%S')}] [DRIVE] ERRO no upload de {local_path.name}: {err}")
+        log.error("[DRIVE] ERRO no upload de %s: %s", local_path.name, err)
         raise
 
 
@@ -358,85 +491,224 @@ def create_course(classroom_service, name: str, section: str) -> str:
         "courseState": "ACTIVE",
     }
     try:
-        course = classroom_service.courses().create(body=course_body).execute()
+        course = (
+            classroom_service.courses()
+            .create(body=course_body, fields="id")
+            .execute(num_retries=5)
+        )
         course_id = course["id"]
-        print(f"[{time.strftime('%H:%M:%S')}] [CLASSROOM] Curso criado: {name} (id={course_id})")
+        log.info("[CLASSROOM] Curso criado: %s (id=%s)", name, course_id)
         return course_id
     except HttpError as err:
-        print(f"[{time.strftime('%H:%M:%S')}] [CLASSROOM] ERRO ao criar curso {name}: {err}")
+        log.error("[CLASSROOM] ERRO ao criar curso %s: %s", name, err)
         raise
 
 
-def create_topic(classroom_service, course_id: str, topic_name: str) -> str:
+# As chamadas diretas usam execute(num_retries=5): o próprio googleapiclient
+# refaz com backoff exponencial as respostas 429/5xx, então um soluço
+# transitório não derruba o pipeline no meio de um curso. Os lotes
+# (BatchHttpRequest, cujo execute() não aceita num_retries) passam por
+# executar_batch_com_backoff, que refaz rodadas e sub-requisições 429/5xx.
+
+# Limite de sub-requisições por BatchHttpRequest imposto pelo Google
+BATCH_LIMIT = 50
+
+
+def create_topics(
+    classroom_service, course_id: str, topic_names: List[str]
+) -> Dict[str, str]:
     """
-    Cria um tópico em um curso e retorna o topicId.
+    Cria todos os tópicos de um curso em lotes (BatchHttpRequest),
+    em vez de um round-trip HTTPS por tópico.
+    Retorna dict nome do tópico -> topicId.
     """
-    body = {"name": topic_name}
-    try:
-        topic = (
-            classroom_service.courses()
-            .topics()
-            .create(courseId=course_id, body=body)
-            .execute()
+    topic_ids: Dict[str, str] = {}
+
+    def _on_topic_created(request_id, response, exception):
+        if exception is not None:
+            log.error("[CLASSROOM]   ERRO ao criar tópico %s: %s", request_id, exception)
+            # Se for o erro 403, adiciona uma mensagem útil
+            if (
+                isinstance(exception, HttpError)
+                and exception.resp.status == 403
+                and 'ACCESS_TOKEN_SCOPE_INSUFFICIENT' in str(exception)
+            ):
+                log.error("!!! OCORREU O ERRO DE SCOPE 403 NA CRIAÇÃO DE TÓPICO !!!")
+                log.error("SOLUÇÃO: Feche o programa e EXCLUA o arquivo 'token.json' na sua BASE_DIR.")
+                log.error("Isso forçará a reautenticação com as permissões corretas.")
+            return
+        topic_ids[request_id] = response["topicId"]
+        log.info("[CLASSROOM]   Tópico criado: %s (topicId=%s)", request_id, response["topicId"])
+
+    requisicoes = [
+        (
+            topic_name,
+            classroom_service.courses().topics().create(
+                courseId=course_id, body={"name": topic_name},
+                fields="topicId"
+            ),
         )
-        topic_id = topic["topicId"]
-        print(f"[{time.strftime('%H:%M:%S')}] [CLASSROOM]   Tópico criado: {topic_name} (topicId={topic_id})")
-        return topic_id
-    except HttpError as err:
-        print(f"[{time.strftime('%H:%M:%S')}] [CLASSROOM]   ERRO ao criar tópico {topic_name}: {err}")
-        # Se for o erro 403, adiciona uma mensagem útil
-        if err.resp.status == 403 and 'ACCESS_TOKEN_SCOPE_INSUFFICIENT' in str(err):
-             print("\n!!! OCORREU O ERRO DE SCOPE 403 NA CRIAÇÃO DE TÓPICO !!!")
-             print("SOLUÇÃO: Feche o programa e EXCLUA o arquivo 'token.json' na sua BASE_DIR.")
-             print("Isso forçará a reautenticação com as permissões corretas.")
-        raise
+        for topic_name in topic_names
+    ]
+    executar_batch_com_backoff(classroom_service, requisicoes, _on_topic_created)
+
+    return topic_ids
 
 
-def create_material(
+def create_materials(
     classroom_service,
     course_id: str,
-    topic_id: str,
-    title: str,
-    drive_file_id: str,
+    materiais: List[Tuple[str, str, str]],
     description: str = "",
 ) -> None:
     """
-    Cria um material (courseWorkMaterial) no Classroom associado a um arquivo do Drive.
+    Cria os materiais (courseWorkMaterials) de um curso em lotes
+    (BatchHttpRequest). Cada item de 'materiais' é
+    (topic_id, title, drive_file_id).
     """
-    body = {
-        "title": title,
-        "description": description,
-        "materials": [
-            {
-                "driveFile": {
+
+    def _on_material_created(request_id, response, exception):
+        if exception is not None:
+            log.error("[CLASSROOM]     ERRO ao criar material %s: %s", request_id, exception)
+            return
+        log.debug("[CLASSROOM]     Material criado: %s (id=%s)", request_id, response["id"])
+
+    requisicoes = []
+    for topic_id, title, drive_file_id in materiais:
+        body = {
+            "title": title,
+            "description": description,
+            "materials": [
+                {
                     "driveFile": {
-                        "id": drive_file_id,
+                        "driveFile": {
+                            "id": drive_file_id,
+                        }
                     }
                 }
-            }
-        ],
-        "topicId": topic_id,
-        "state": "PUBLISHED" # Garante que o material é visível imediatamente
-    }
-    try:
-        material = (
-            classroom_service.courses()
-            .courseWorkMaterials()
-            .create(courseId=course_id, body=body)
-            .execute()
-        )
-        material_id = material["id"]
-        print(f"[{time.strftime('%H:%M:%S')}] [CLASSROOM]     Material criado: {title} (id={material_id})")
-    except HttpError as err:
-        print(f"[{time.strftime('%H:%M:%S')}] [CLASSROOM]     ERRO ao criar material {title}: {err}")
-        raise
+            ],
+            "topicId": topic_id,
+            "state": "PUBLISHED" # Garante que o material é visível imediatamente
+        }
+        requisicoes.append((
+            title,
+            classroom_service.courses().courseWorkMaterials().create(
+                courseId=course_id, body=body, fields="id"
+            ),
+        ))
+    executar_batch_com_backoff(classroom_service, requisicoes, _on_material_created)
 
 
 # ============================================================
 # 5) PIPELINE PRINCIPAL
 # ============================================================
 
+def process_course(
+    course_def: Dict[str, Any],
+    creds: Credentials,
+    files_index: Dict[str, Path],
+    cache_uploads: Dict[str, str],
+    seen_uploads: Dict[Path, Any],
+    description: str,
+) -> None:
+    """
+    Pipeline completo de um curso: cria o curso, os tópicos em lote, sobe
+    os DOCX em paralelo e cria os materiais em lote.
+
+    Roda dentro de uma thread do pool de cursos, por isso usa o
+    classroom_service próprio da thread (httplib2 não é thread-safe).
+    """
+    classroom_service = _classroom_service_da_thread(creds)
+
+    course_name = course_def["name"]
+    section = course_def.get("section", "")
+
+    log.info("--- Iniciando Curso: %s ---", course_name)
+
+    # 1) Cria curso
+    course_id = create_course(classroom_service, course_name, section)
+
+    # 2) Cria todos os tópicos do curso em um único lote
+    topic_names = [t["name"] for t in course_def.get("topics", [])]
+    topic_ids = create_topics(classroom_service, course_id, topic_names)
+
+    # Junta os materiais que têm arquivo local e tópico criado,
+    # como (arquivo, topic_id, title)
+    uploads: List[Tuple[Path, str, str]] = []
+
+    for topic_def in course_def.get("topics", []):
+        topic_id = topic_ids.get(topic_def["name"])
+        if not topic_id:
+            # Falha já reportada pelo callback do lote
+            continue
+
+        for mat in topic_def.get("materials", []):
+            title = mat["title"]
+            filename = mat["filename"]
+
+            log.debug("Processando material: %s (Arquivo: %s)", title, filename)
+
+            # Lookup O(1) no índice, com a mesma normalização NFC
+            local_path = files_index.get(
+                unicodedata.normalize("NFC", filename)
+            )
+
+            if local_path is None:
+                log.warning(
+                    "[AVISO] Arquivo não encontrado: %s. Pulei este material.",
+                    MODULOS_DIR / filename,
+                )
+                continue
+
+            uploads.append((local_path, topic_id, title))
+
+    # 3) Sobe os DOCX do curso em paralelo (o gargalo é o RTT do Drive,
+    # não a banda) e consome os resultados com as_completed: o material de
+    # um upload que já terminou não espera o upload mais lento do curso.
+    # Os prontos acumulam em lotes de até BATCH_LIMIT antes de ir ao
+    # Classroom (Drive e Classroom têm cotas independentes, então as duas
+    # fases se sobrepõem).
+    pendentes: List[Tuple[str, str, str]] = []
+
+    with ThreadPoolExecutor(max_workers=UPLOAD_WORKERS) as executor:
+        futures = {
+            executor.submit(
+                _upload_em_thread, creds, arquivo, cache_uploads, seen_uploads
+            ): (topic_id, title)
+            for arquivo, topic_id, title in uploads
+        }
+
+        for future in as_completed(futures):
+            topic_id, title = futures[future]
+            pendentes.append((topic_id, title, future.result()))
+            if len(pendentes) == BATCH_LIMIT:
+                create_materials(
+                    classroom_service, course_id, pendentes, description=description
+                )
+                pendentes = []
+
+    # Último lote parcial
+    if pendentes:
+        create_materials(
+            classroom_service, course_id, pendentes, description=description
+        )
+
+
+def montar_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        description="Cria cursos, tópicos e materiais no Google Classroom a partir de COURSES_STRUCTURE.",
+    )
+    parser.add_argument(
+        "--ignore-missing",
+        action="store_true",
+        help="prossegue mesmo com arquivos DOCX faltando (os materiais sem arquivo são pulados)",
+    )
+    return parser
+
+
 def main():
+    args = montar_parser().parse_args()
+
     print("============================================")
     print("INÍCIO DO PROCESSAMENTO DE CRIAÇÃO DE CURSOS")
     print("============================================")
@@ -444,62 +716,72 @@ def main():
     print(f"Pasta de Módulos (DOCX): {MODULOS_DIR}")
     
     try:
-        # 1) Autentica e obtém serviços
-        classroom_service, drive_service = get_services()
-
-        # 2) Percorre a estrutura de cursos
-        for course_def in COURSES_STRUCTURE:
-            course_name = course_def["name"]
-            section = course_def.get("section", "")
-
-            print(f"\n--- Iniciando Curso: {course_name} ---")
-
-            # 2.1) Cria curso
-            course_id = create_course(classroom_service, course_name, section)
-
-            # 2.2) Cria tópicos
-            for topic_def in course_def.get("topics", []):
-                topic_name = topic_def["name"]
-                
-                # Cria tópico
-                topic_id = create_topic(classroom_service, course_id, topic_name)
-
-                # 2.3) Cria materiais (upload para Drive + material no Classroom)
-                for mat in topic_def.get("materials", []):
-                    title = mat["title"]
-                    # Normaliza o nome do arquivo para garantir que espaços/caracteres especiais
-                    # do CODES_STRUCTURE coincidam com o nome real do arquivo.
-                    filename = mat["filename"].replace(" ", " ") 
-
-                    local_path = MODULOS_DIR / filename
-                    
-                    print(f"[{time.strftime('%H:%M:%S')}] Processando material: {title} (Arquivo: {filename})")
-                    
-                    if not local_path.exists():
-                        print(
-                            f"[{time.strftime('%H:%M:%S')}] [AVISO] Arquivo não encontrado: {local_path}. "
-                            f"Pulei este material."
-                        )
-                        continue
-
-                    # Upload para o Drive
-                    file_id = upload_to_drive(drive_service, local_path)
-
-                    # Descrição padrão
-                    description = (
-                        "Material obrigatório do treinamento. "
-                        "Leia o conteúdo e, se houver formulário de avaliação, responda ao final."
-                    )
-
-                    # Cria material no Classroom
-                    create_material(
-                        classroom_service,
-                        course_id,
-                        topic_id,
-                        title,
-                        file_id,
-                        description=description,
-                    )
+        # 1) Autentica uma única vez; cada thread de curso/upload constrói
+        # os próprios serviços a partir destas credenciais.
+        creds = get_credentials()
+
+        # Cache de uploads de execuções anteriores
+        cache_uploads = carregar_cache_uploads()
+
+        # Dedupe desta execução: caminho resolvido -> fileId, compartilhado
+        # por todas as threads de curso
+        seen_uploads: Dict[Path, Any] = {}
+
+        # Descrição padrão dos materiais
+        description = (
+            "Material obrigatório do treinamento. "
+            "Leia o conteúdo e, se houver formulário de avaliação, responda ao final."
+        )
+
+        # Indexa MODULOS_DIR uma única vez: 1 scandir em vez de um stat
+        # por material. Os nomes são normalizados em NFC para casar
+        # acentos compostos/decompostos entre COURSES_STRUCTURE e o que o
+        # filesystem devolve.
+        files_index: Dict[str, Path] = {}
+        if MODULOS_DIR.exists():
+            files_index = {
+                unicodedata.normalize("NFC", entry.name): Path(entry.path)
+                for entry in os.scandir(MODULOS_DIR)
+                if entry.is_file()
+            }
+        else:
+            log.warning("[AVISO] Pasta de módulos não encontrada: %s", MODULOS_DIR)
+
+        # Valida os arquivos ANTES de qualquer chamada de API: um nome de
+        # arquivo errado não pode custar cursos vazios no Classroom (que
+        # depois precisam ser arquivados e excluídos um a um).
+        faltando = [
+            mat["filename"]
+            for course_def in COURSES_STRUCTURE
+            for topic_def in course_def.get("topics", [])
+            for mat in topic_def.get("materials", [])
+            if unicodedata.normalize("NFC", mat["filename"]) not in files_index
+        ]
+        if faltando and not args.ignore_missing:
+            log.error("[ERRO] %d arquivo(s) de material não encontrado(s) em %s:", len(faltando), MODULOS_DIR)
+            for nome in faltando:
+                log.error("  - %s", nome)
+            log.error("Nada foi criado no Classroom. Corrija os nomes ou rode com --ignore-missing.")
+            sys.exit(1)
+
+        # 2) Processa os cursos em paralelo: cada item de COURSES_STRUCTURE
+        # é independente, então cada um vira uma task do pool.
+        with ThreadPoolExecutor(max_workers=COURSE_WORKERS) as executor:
+            futures = [
+                executor.submit(
+                    process_course,
+                    course_def,
+                    creds,
+                    files_index,
+                    cache_uploads,
+                    seen_uploads,
+                    description,
+                )
+                for course_def in COURSES_STRUCTURE
+            ]
+            # .result() propaga qualquer exceção das threads de curso
+            for future in futures:
+                future.result()
 
         print("\n==============================================")
         print("===== PROCESSO CONCLUÍDO COM SUCESSO ======")
@@ -7,75 +7,46 @@ from __future__ import annotations
 # - A exclusão (DELETE) é permanente e só funciona para cursos ARQUIVADOS.
 # """
 
-import os
-import time
-from pathlib import Path
-from typing import Dict, Any, List, Tuple
+import logging
+from typing import Dict, Any, List
 
-from googleapiclient.discovery import build
-from googleapiclient.errors import HttpError
-from google.oauth2.credentials import Credentials
-from google_auth_oauthlib.flow import InstalledAppFlow
-from google.auth.transport.requests import Request
+# Timestamp via %(asctime)s do logging, formatado apenas para registros
+# emitidos, em vez de um time.strftime por print
+logging.basicConfig(format="[%(asctime)s] %(message)s", datefmt="%H:%M:%S", level=logging.INFO)
+log = logging.getLogger(__name__)
 
 # ============================================================
-# 1) CONFIGURAÇÕES GERAIS (As mesmas do script anterior)
+# 1) CONFIGURAÇÕES / AUTENTICAÇÃO
 # ============================================================
 
-# Escopos necessários para listar, arquivar e deletar
-SCOPES = [
-    "https://www.googleapis.com/auth/classroom.courses",              # Permite listar, criar, arquivar e deletar
-]
-
-
-# Pasta onde estão credentials.json e token.json
-BASE_DIR = Path(r"C:\Users\Administrador\Documents\Estudos\python\treinamentos")
-CREDENTIALS_FILE = BASE_DIR / "credentials.json"
-TOKEN_FILE = BASE_DIR / "token.json"
-
-
-# ============================================================
-# 2) AUTENTICAÇÃO GOOGLE (Reutilizando as funções anteriores)
-# ============================================================
-
-def get_credentials() -> Credentials:
-    """
-    Carrega credenciais do token.json; se não existir, usa credentials.json
-    para gerar token via fluxo OAuth no navegador.
-    """
-    creds = None
-    if TOKEN_FILE.exists():
-        print(f"[{time.strftime('%H:%M:%S')}] Tentando carregar credenciais...")
-        # NOTA: O SCOPE foi alterado para incluir apenas 'classroom.courses'
-        # o que é suficiente para arquivar/excluir.
-        creds = Credentials.from_authorized_user_file(str(TOKEN_FILE), SCOPES) 
-
-    if not creds or not creds.valid:
-        if creds and creds.expired and creds.refresh_token:
-            creds.refresh(Request())
-        else:
-            print(f"[{time.strftime('%H:%M:%S')}] Credenciais inválidas. Iniciando fluxo OAuth.")
-            try:
-                flow = InstalledAppFlow.from_client_secrets_file(str(CREDENTIALS_FILE), SCOPES)
-                creds = flow.run_local_server(port=0)
-            except FileNotFoundError:
-                print(f"\n[ERRO FATAL] Arquivo de credenciais '{CREDENTIALS_FILE.name}' não encontrado.")
-                exit(1)
-            
-        with open(TOKEN_FILE, "w", encoding="utf-8") as token:
-            token.write(creds.to_json())
-        print(f"[{time.strftime('%H:%M:%S')}] Novo token salvo.")
-    else:
-         print(f"[{time.strftime('%H:%M:%S')}] Credenciais carregadas e válidas.")
-    return creds
+# Escopos, credentials.json e token.json vêm de classroom_common.py,
+# compartilhados com os demais scripts (um token só, com a união dos
+# escopos, autorizado uma única vez).
+#
+# Os imports do googleapiclient/httplib2 são feitos dentro das funções
+# que os usam: carregar essas bibliotecas custa centenas de ms de disco
+# frio, que caminhos de saída rápida (erro de configuração, --help em
+# uso futuro) não deveriam pagar.
 
 
 def get_classroom_service() -> Any:
     """
     Retorna o serviço do Google Classroom.
     """
+    # Import tardio das bibliotecas pesadas (ver nota no topo do arquivo)
+    import httplib2
+    import google_auth_httplib2
+    from googleapiclient.discovery import build
+
+    from classroom_common import get_credentials
+
     creds = get_credentials()
-    classroom_service = build("classroom", "v1", credentials=creds)
+    # Http autenticado único: as várias chamadas de listar/arquivar/excluir
+    # reutilizam a mesma conexão TLS.
+    http = google_auth_httplib2.AuthorizedHttp(creds, http=httplib2.Http(timeout=30))
+    # static_discovery usa o discovery document embutido no pacote, sem o
+    # fetch HTTPS do documento na inicialização.
+    classroom_service = build("classroom", "v1", http=http, static_discovery=True)
     return classroom_service
 
 
@@ -88,13 +59,18 @@ def list_courses(service: Any, course_state: str = "ACTIVE") -> List[Dict[str, s
     Lista todos os cursos em um determinado estado (ACTIVE, ARCHIVED, PROVISIONED, DECLINED).
     Retorna uma lista de dicionários com 'id' e 'name'.
     """
-    print(f"\n[{time.strftime('%H:%M:%S')}] Buscando cursos no estado: {course_state}...")
-    results = service.courses().list(courseStates=course_state).execute()
+    log.info("Buscando cursos no estado: %s...", course_state)
+    # Máscara de resposta parcial: o servidor devolve só id/name/section,
+    # em vez do recurso Course inteiro por curso.
+    results = service.courses().list(
+        courseStates=course_state,
+        fields="nextPageToken,courses(id,name,section)",
+    ).execute(num_retries=5)
     courses = results.get("courses", [])
     
     course_list = []
     if not courses:
-        print(f"[{time.strftime('%H:%M:%S')}] Nenhum curso encontrado no estado {course_state}.")
+        log.info("Nenhum curso encontrado no estado %s.", course_state)
         return []
     
     print("-" * 50)
@@ -114,23 +90,26 @@ def list_courses(service: Any, course_state: str = "ACTIVE") -> List[Dict[str, s
 def archive_course(service: Any, course_id: str) -> bool:
     """
     Altera o estado do curso para ARCHIVED (arquivado).
+
+    Um único PATCH com updateMask, sem o GET prévio de conferência:
+    arquivar um curso já arquivado é idempotente, então a checagem só
+    custava um round-trip extra por curso.
     """
+    from googleapiclient.errors import HttpError
+
     try:
-        course = service.courses().get(id=course_id).execute()
-        
-        if course.get("courseState") == "ARCHIVED":
-            print(f"[{time.strftime('%H:%M:%S')}] [AVISO] Curso ID {course_id} já está ARQUIVADO.")
-            return True
-
-        course["courseState"] = "ARCHIVED"
-        service.courses().update(id=course_id, body=course).execute()
-        print(f"[{time.strftime('%H:%M:%S')}] [SUCESSO] Curso ID {course_id} ARQUIVADO com sucesso!")
+        service.courses().patch(
+            id=course_id,
+            updateMask="courseState",
+            body={"courseState": "ARCHIVED"},
+        ).execute(num_retries=5)
+        log.info("[SUCESSO] Curso ID %s ARQUIVADO com sucesso!", course_id)
         return True
     except HttpError as err:
-        print(f"[{time.strftime('%H:%M:%S')}] [ERRO] Falha ao ARQUIVAR curso ID {course_id}: {err}")
+        log.error("[ERRO] Falha ao ARQUIVAR curso ID %s: %s", course_id, err)
         return False
     except Exception as e:
-        print(f"[{time.strftime('%H:%M:%S')}] [ERRO] Ocorreu um erro inesperado: {e}")
+        log.error("[ERRO] Ocorreu um erro inesperado: %s", e)
         return False
 
 
@@ -139,23 +118,84 @@ def delete_archived_course(service: Any, course_id: str) -> bool:
     Exclui permanentemente um curso ARQUIVADO. 
     Atenção: A exclusão é irreversível.
     """
+    from googleapiclient.errors import HttpError
+
     try:
-        course = service.courses().get(id=course_id).execute()
-        if course.get("courseState") != "ARCHIVED":
-            print(f"[{time.strftime('%H:%M:%S')}] [AVISO] O curso ID {course_id} NÃO está ARQUIVADO. Exclua-o primeiro.")
-            return False
-            
-        service.courses().delete(id=course_id).execute()
-        print(f"[{time.strftime('%H:%M:%S')}] [SUCESSO] Curso ID {course_id} EXCLUÍDO permanentemente.")
+        # DELETE direto, sem GET prévio: se o curso não estiver ARQUIVADO
+        # a API devolve 400 FAILED_PRECONDITION, tratado abaixo.
+        service.courses().delete(id=course_id).execute(num_retries=5)
+        log.info("[SUCESSO] Curso ID %s EXCLUÍDO permanentemente.", course_id)
         return True
     except HttpError as err:
-        print(f"[{time.strftime('%H:%M:%S')}] [ERRO] Falha ao EXCLUIR curso ID {course_id}: {err}")
+        if err.resp.status == 400 and "FAILED_PRECONDITION" in str(err):
+            log.warning("[AVISO] O curso ID %s NÃO está ARQUIVADO. Arquive-o primeiro.", course_id)
+            return False
+        log.error("[ERRO] Falha ao EXCLUIR curso ID %s: %s", course_id, err)
         return False
     except Exception as e:
-        print(f"[{time.strftime('%H:%M:%S')}] [ERRO] Ocorreu um erro inesperado: {e}")
+        log.error("[ERRO] Ocorreu um erro inesperado: %s", e)
         return False
 
 
+def archive_courses_em_lote(service: Any, course_ids: List[str]) -> List[str]:
+    """
+    Arquiva vários cursos em lotes (BatchHttpRequest) de até 50 PATCHes
+    por requisição HTTPS, com backoff exponencial para rodadas e
+    sub-requisições 429/5xx. Retorna os ids arquivados com sucesso.
+    """
+    from classroom_common import executar_batch_com_backoff
+
+    arquivados: List[str] = []
+
+    def _on_archive(request_id, response, exception):
+        if exception is not None:
+            log.error("[ERRO] Falha ao ARQUIVAR curso ID %s: %s", request_id, exception)
+            return
+        arquivados.append(request_id)
+        log.info("[SUCESSO] Curso ID %s ARQUIVADO.", request_id)
+
+    requisicoes = [
+        (
+            cid,
+            service.courses().patch(
+                id=cid,
+                updateMask="courseState",
+                body={"courseState": "ARCHIVED"},
+            ),
+        )
+        for cid in course_ids
+    ]
+    executar_batch_com_backoff(service, requisicoes, _on_archive)
+
+    return arquivados
+
+
+def delete_courses_em_lote(service: Any, course_ids: List[str]) -> None:
+    """
+    Exclui permanentemente vários cursos (já ARQUIVADOS) em lotes de até
+    50 DELETEs por requisição HTTPS. A exclusão é irreversível.
+    """
+    from googleapiclient.errors import HttpError
+
+    from classroom_common import executar_batch_com_backoff
+
+    def _on_delete(request_id, response, exception):
+        if exception is not None:
+            if (
+                isinstance(exception, HttpError)
+                and exception.resp.status == 400
+                and "FAILED_PRECONDITION" in str(exception)
+            ):
+                log.warning("[AVISO] O curso ID %s NÃO está ARQUIVADO. Arquive-o primeiro.", request_id)
+                return
+            log.error("[ERRO] Falha ao EXCLUIR curso ID %s: %s", request_id, exception)
+            return
+        log.info("[SUCESSO] Curso ID %s EXCLUÍDO permanentemente.", request_id)
+
+    requisicoes = [(cid, service.courses().delete(id=cid)) for cid in course_ids]
+    executar_batch_com_backoff(service, requisicoes, _on_delete)
+
+
 # ============================================================
 # 4) EXEMPLO DE USO
 # ============================================================
@@ -182,15 +222,14 @@ def run_manager():
         "832437087456",
     ]
 
-    # PASSO 2: ARQUIVAR (se ainda estiverem ativos) E EXCLUIR
-    for course_id in courses_to_remove:
-        print(f"\n>>> Processando curso ID {course_id}...")
-
-        # 2.1) Arquiva se ainda não estiver arquivado
-        archive_course(service, course_id)
+    # PASSO 2: ARQUIVAR E EXCLUIR, em dois lotes
+    # (2N round-trips viram ~2 por lote de 50 cursos)
+    print(f"\n>>> Arquivando {len(courses_to_remove)} cursos em lote...")
+    arquivados = archive_courses_em_lote(service, courses_to_remove)
 
-        # 2.2) Exclui definitivamente (só funciona se estiver ARQUIVADO)
-        delete_archived_course(service, course_id)
+    # Só exclui o que arquivou (a exclusão exige estado ARCHIVED)
+    print(f"\n>>> Excluindo {len(arquivados)} cursos em lote...")
+    delete_courses_em_lote(service, arquivados)
 
 if __name__ == "__main__":
     run_manager()
\ No newline at end of file
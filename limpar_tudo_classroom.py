@@ -11,10 +11,18 @@ dos cursos selecionados do Google Classroom.
 NÃO exclui cursos nem alunos.
 """
 
+import logging
+import os
+import queue
+import threading
 import time
+from logging.handlers import QueueHandler, QueueListener
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import Any, List, Dict
+from typing import Any, List, Dict, Optional
 
+import httplib2
+import google_auth_httplib2
 from googleapiclient.discovery import build
 from googleapiclient.errors import HttpError
 from google.oauth2.credentials import Credentials
@@ -37,37 +45,84 @@ CREDENTIALS_FILE = BASE_DIR / "credentials.json"
 TOKEN_FILE = BASE_DIR / "token.json"
 
 
+# ------------------------------------------------------------
+# Logging não-bloqueante: cada thread só enfileira o registro
+# (QueueHandler) e uma QueueListener única faz o I/O em stdout — os
+# workers da limpeza não disputam o lock de stdout nem pagam
+# time.strftime por linha. LIMPEZA_DEBUG=1 habilita o nível DEBUG.
+# ------------------------------------------------------------
+_log_queue: queue.Queue = queue.Queue()
+_log_handler = logging.StreamHandler()
+_log_handler.setFormatter(logging.Formatter("[%(asctime)s] %(message)s", datefmt="%H:%M:%S"))
+_log_listener = QueueListener(_log_queue, _log_handler)
+_log_listener.start()
+
+log = logging.getLogger("limpeza")
+log.setLevel(logging.DEBUG if os.environ.get("LIMPEZA_DEBUG") else logging.INFO)
+log.addHandler(QueueHandler(_log_queue))
+
+
 # ============================================================
 # 2) AUTENTICAÇÃO
 # ============================================================
 
+# Credenciais já resolvidas neste processo (warm start de chamadas
+# repetidas não relê o token.json)
+_CACHED_CREDS: Optional[Credentials] = None
+
+
 def get_credentials() -> Credentials:
+    global _CACHED_CREDS
+    if _CACHED_CREDS is not None and _CACHED_CREDS.valid:
+        return _CACHED_CREDS
+
     creds = None
     if TOKEN_FILE.exists():
-        print(f"[{time.strftime('%H:%M:%S')}] Tentando carregar token existente...")
+        log.info("Tentando carregar token existente...")
         creds = Credentials.from_authorized_user_file(str(TOKEN_FILE), SCOPES)
 
     if not creds or not creds.valid:
         if creds and creds.expired and creds.refresh_token:
-            print(f"[{time.strftime('%H:%M:%S')}] Token expirado. Renovando...")
+            log.info("Token expirado. Renovando...")
             creds.refresh(Request())
         else:
-            print(f"[{time.strftime('%H:%M:%S')}] Criando novo token via OAuth...")
+            log.info("Criando novo token via OAuth...")
             flow = InstalledAppFlow.from_client_secrets_file(str(CREDENTIALS_FILE), SCOPES)
             creds = flow.run_local_server(port=0)
             with open(TOKEN_FILE, "w", encoding="utf-8") as token:
                 token.write(creds.to_json())
-            print(f"[{time.strftime('%H:%M:%S')}] Novo token salvo em {TOKEN_FILE.name}.")
+            log.info("Novo token salvo em %s.", TOKEN_FILE.name)
     else:
-        print(f"[{time.strftime('%H:%M:%S')}] Token válido carregado.")
+        log.info("Token válido carregado.")
 
+    _CACHED_CREDS = creds
     return creds
 
 
-def get_classroom_service() -> Any:
-    creds = get_credentials()
-    service = build("classroom", "v1", credentials=creds)
-    return service
+# Cursos limpos em paralelo: cada limpeza é I/O de API independente
+COURSE_WORKERS = 8
+
+_thread_local = threading.local()
+
+
+def _service_da_thread(creds: Credentials) -> Any:
+    """
+    Retorna um classroom_service exclusivo da thread atual.
+
+    O transporte httplib2 do googleapiclient NÃO é thread-safe; cada
+    worker do pool constrói e reaproveita o seu próprio serviço.
+    """
+    if getattr(_thread_local, "service", None) is None:
+        # Http autenticado com keep-alive: as centenas de chamadas da
+        # limpeza reutilizam o mesmo socket TLS da thread em vez de pagar
+        # um handshake por requisição.
+        # static_discovery usa o discovery document embutido no pacote,
+        # sem o fetch HTTPS do documento na construção do serviço.
+        http = google_auth_httplib2.AuthorizedHttp(creds, http=httplib2.Http(timeout=30))
+        _thread_local.service = build(
+            "classroom", "v1", http=http, static_discovery=True
+        )
+    return _thread_local.service
 
 
 # ============================================================
@@ -77,30 +132,56 @@ def get_classroom_service() -> Any:
 def listar_cursos(service: Any) -> List[Dict[str, str]]:
     """
     Lista cursos em estados ACTIVE e ARCHIVED.
+
+    As páginas dos dois estados vão juntas em um BatchHttpRequest: a
+    primeira rodada custa 1 round-trip em vez de 2, e estados que ainda
+    têm nextPageToken entram na rodada seguinte.
     Retorna lista de dicts com id, name, state.
     """
     cursos: List[Dict[str, str]] = []
 
-    for estado in ["ACTIVE", "ARCHIVED"]:
-        print(f"\n[{time.strftime('%H:%M:%S')}] Buscando cursos estado={estado}...")
-        page_token = None
-        while True:
-            res = service.courses().list(
-                courseStates=estado,
-                pageToken=page_token
-            ).execute()
-            for c in res.get("courses", []):
+    log.info("Buscando cursos (ACTIVE + ARCHIVED)...")
+
+    # Pendências como (estado, pageToken); None = primeira página
+    pendentes = [("ACTIVE", None), ("ARCHIVED", None)]
+
+    while pendentes:
+        proximas: List[Any] = []
+
+        def _cb(request_id, response, exception):
+            if exception is not None:
+                log.error("ERRO ao listar cursos estado=%s: %s", request_id, exception)
+                return
+            for c in response.get("courses", []):
                 cursos.append(
                     {
                         "id": c["id"],
                         "name": c["name"],
-                        "state": c.get("courseState", estado),
+                        "state": c.get("courseState", request_id),
                         "section": c.get("section", ""),
                     }
                 )
-            page_token = res.get("nextPageToken")
-            if not page_token:
-                break
+            token = response.get("nextPageToken")
+            if token:
+                proximas.append((request_id, token))
+
+        batch = service.new_batch_http_request(callback=_cb)
+        # Cada estado entra no máximo 1x por rodada, então o próprio
+        # estado serve de request_id único dentro do lote.
+        for estado, tok in pendentes:
+            batch.add(
+                service.courses().list(
+                    courseStates=estado,
+                    pageToken=tok,
+                    # página no teto da API: menos voltas de pageToken
+                    pageSize=100,
+                    # máscara de resposta parcial: só os campos usados
+                    fields="nextPageToken,courses(id,name,section,courseState)",
+                ),
+                request_id=estado,
+            )
+        batch.execute()
+        pendentes = proximas
 
     print("\n===== CURSOS ENCONTRADOS =====")
     for c in cursos:
@@ -109,93 +190,225 @@ def listar_cursos(service: Any) -> List[Dict[str, str]]:
     return cursos
 
 
-def deletar_materiais(service: Any, course_id: str) -> int:
+# Limite de sub-requisições por BatchHttpRequest imposto pelo Google
+BATCH_LIMIT = 50
+
+# Fila entre o produtor (paginação do list) e os consumidores (lotes de
+# delete): limitada para a paginação não correr quilômetros à frente.
+FILA_MAXSIZE = 200
+DELETE_CONSUMERS = 2
+
+# Sentinela que encerra um consumidor (um put por consumidor)
+_SENTINELA: Any = object()
+
+# Status HTTP que valem nova tentativa com backoff (quota/transitórios)
+_STATUS_TRANSIENTES = (429, 500, 502, 503, 504)
+
+
+def _deletar_lote_com_backoff(service, lote, montar_delete, contagem, lock,
+                              tentativas: int = 5) -> None:
     """
-    Deleta TODOS os courseWorkMaterials de um curso.
-    Retorna quantidade apagada.
+    Dispara um lote de deletes com backoff exponencial nos dois níveis:
+
+    - sub-requisições que falharem com 429/5xx — o caso esperado com
+      8 workers de curso × 2 consumidores batendo na cota de escrita —
+      são recolhidas e reenviadas na rodada seguinte (delete é
+      idempotente; um 404 na retentativa conta como já apagado);
+    - uma falha da rodada inteira (inclusive erros de transporte que não
+      são HttpError, como ServerNotFoundError) reexecuta o lote após a
+      espera, em vez de descartar até 50 deletes ou matar a thread.
+
+    Só depois de esgotar as tentativas os itens restantes são descartados
+    com erro no log, mantendo o consumidor vivo.
     """
-    print(f"\n[{time.strftime('%H:%M:%S')}] Listando MATERIAIS do curso {course_id}...")
-    page_token = None
-    total = 0
-
-    while True:
+    pendentes = list(lote)
+    for tentativa in range(tentativas):
+        ultima = tentativa == tentativas - 1
+        refazer: List[Any] = []
+        por_id = dict(pendentes)
+
+        def _cb(request_id, response, exception):
+            if exception is not None:
+                if isinstance(exception, HttpError):
+                    status = getattr(exception.resp, "status", None)
+                    if status == 404:
+                        # Já não existe (apagado por uma tentativa anterior
+                        # ou por outra via): conta como concluído
+                        with lock:
+                            contagem[0] += 1
+                        return
+                    if status in _STATUS_TRANSIENTES and not ultima:
+                        refazer.append((request_id, por_id[request_id]))
+                        return
+                log.error("  ERRO ao deletar %s: %s", request_id, exception)
+                return
+            with lock:
+                contagem[0] += 1
+
+        batch = service.new_batch_http_request(callback=_cb)
+        for descricao, item_id in pendentes:
+            # descrição inclui o id, então é única dentro do lote
+            batch.add(montar_delete(service, item_id), request_id=descricao)
         try:
-            res = service.courses().courseWorkMaterials().list(
-                courseId=course_id,
-                pageToken=page_token
-            ).execute()
-        except HttpError as err:
-            print(f"[{time.strftime('%H:%M:%S')}] ERRO ao listar materiais do curso {course_id}: {err}")
-            return total
-
-        materials = res.get("courseWorkMaterial", [])
-        if not materials and not page_token:
-            print(f"[{time.strftime('%H:%M:%S')}] Nenhum material encontrado neste curso.")
+            batch.execute()
+        except Exception as e:
+            if ultima:
+                log.error("  ERRO no lote de deletes (%s itens descartados): %s", len(pendentes), e)
+                return
+            log.warning("  Lote de deletes falhou (%s); tentando de novo em %ss", e, 2 ** tentativa)
+            time.sleep(2 ** tentativa)
+            continue  # reenvia o mesmo lote (deletes são idempotentes)
+
+        if not refazer:
+            return
+        time.sleep(2 ** tentativa)
+        pendentes = refazer
+
+
+def _consumidor_de_deletes(creds, fila, montar_delete, contagem, lock) -> None:
+    """
+    Consumidor do pipeline de limpeza: drena a fila em lotes de até
+    BATCH_LIMIT itens (descrição, id) e dispara os deletes em
+    BatchHttpRequest, com o serviço próprio da thread. 'montar_delete'
+    transforma (service, item_id) na requisição de delete do recurso.
+    Encerra ao consumir uma sentinela.
+    """
+    service = _service_da_thread(creds)
+
+    encerrar = False
+    while not encerrar:
+        item = fila.get()
+        if item is _SENTINELA:
             break
+        lote = [item]
 
-        for m in materials:
-            mat_id = m["id"]
-            mat_title = m.get("title", "(sem título)")
-            print(f"[{time.strftime('%H:%M:%S')}]   Deletando material: {mat_title} (id={mat_id})...")
+        # Junta o que mais já estiver disponível, até fechar o lote
+        while len(lote) < BATCH_LIMIT:
             try:
-                service.courses().courseWorkMaterials().delete(
-                    courseId=course_id,
-                    id=mat_id
-                ).execute()
-                total += 1
-            except HttpError as err:
-                print(f"[{time.strftime('%H:%M:%S')}]   ERRO ao deletar {mat_title} (id={mat_id}): {err}")
-
-        page_token = res.get("nextPageToken")
-        if not page_token:
-            break
+                item = fila.get_nowait()
+            except queue.Empty:
+                break
+            if item is _SENTINELA:
+                encerrar = True
+                break
+            lote.append(item)
 
-    print(f"[{time.strftime('%H:%M:%S')}] Total de materiais deletados neste curso: {total}")
-    return total
+        _deletar_lote_com_backoff(service, lote, montar_delete, contagem, lock)
 
 
-def deletar_coursework(service: Any, course_id: str) -> int:
+def _deletar_pipeline(creds: Credentials, listar_pagina, montar_delete, extrair_itens, rotulo: str) -> int:
     """
-    Deleta TODOS os courseWork (tarefas, trabalhos) de um curso.
-    Retorna quantidade apagada.
+    Pipeline produtor/consumidor da limpeza: esta thread pagina o list()
+    e enfileira os itens, enquanto os consumidores drenam a fila em lotes
+    e disparam os deletes — o RTT da próxima página fica escondido atrás
+    dos deletes da página anterior.
+
+    - listar_pagina(service, page_token) -> resposta do list()
+    - extrair_itens(resposta) -> lista de (descrição, id)
+    - montar_delete(service, item_id) -> requisição de delete
+    Retorna quantos deletes deram certo.
     """
-    print(f"\n[{time.strftime('%H:%M:%S')}] Listando TAREFAS (courseWork) do curso {course_id}...")
+    service = _service_da_thread(creds)
+
+    fila: queue.Queue = queue.Queue(maxsize=FILA_MAXSIZE)
+    contagem = [0]
+    lock = threading.Lock()
+
+    consumidores = [
+        threading.Thread(
+            target=_consumidor_de_deletes,
+            args=(creds, fila, montar_delete, contagem, lock),
+            daemon=True,
+        )
+        for _ in range(DELETE_CONSUMERS)
+    ]
+    for t in consumidores:
+        t.start()
+
+    encontrados = 0
     page_token = None
-    total = 0
-
-    while True:
-        try:
-            res = service.courses().courseWork().list(
-                courseId=course_id,
-                pageToken=page_token
-            ).execute()
-        except HttpError as err:
-            print(f"[{time.strftime('%H:%M:%S')}] ERRO ao listar courseWork do curso {course_id}: {err}")
-            return total
-
-        works = res.get("courseWork", [])
-        if not works and not page_token:
-            print(f"[{time.strftime('%H:%M:%S')}] Nenhuma tarefa encontrada neste curso.")
-            break
-
-        for w in works:
-            work_id = w["id"]
-            work_title = w.get("title", "(sem título)")
-            print(f"[{time.strftime('%H:%M:%S')}]   Deletando tarefa: {work_title} (id={work_id})...")
+    try:
+        while True:
             try:
-                service.courses().courseWork().delete(
-                    courseId=course_id,
-                    id=work_id
-                ).execute()
-                total += 1
+                # num_retries=5 já refaz 429/5xx com backoff exponencial
+                # dentro do próprio googleapiclient; só erros definitivos
+                # (ou retries esgotados) chegam aqui.
+                res = listar_pagina(service, page_token)
             except HttpError as err:
-                print(f"[{time.strftime('%H:%M:%S')}]   ERRO ao deletar {work_title} (id={work_id}): {err}")
+                log.error("ERRO ao listar %s: %s", rotulo, err)
+                break
 
-        page_token = res.get("nextPageToken")
-        if not page_token:
-            break
+            for descricao, item_id in extrair_itens(res):
+                fila.put((descricao, item_id))
+                encontrados += 1
+
+            page_token = res.get("nextPageToken")
+            if not page_token:
+                break
+    finally:
+        for _ in consumidores:
+            fila.put(_SENTINELA)
+        for t in consumidores:
+            t.join()
+
+    if not encontrados:
+        log.info("Nenhum item (%s) encontrado neste curso.", rotulo)
+    return contagem[0]
 
-    print(f"[{time.strftime('%H:%M:%S')}] Total de tarefas deletadas neste curso: {total}")
+
+def deletar_materiais(creds: Credentials, course_id: str) -> int:
+    """
+    Deleta TODOS os courseWorkMaterials de um curso, via pipeline de
+    paginação + lotes de até 50 deletes por requisição HTTPS.
+    Retorna quantidade apagada.
+    """
+    log.debug("Listando MATERIAIS do curso %s...", course_id)
+
+    total = _deletar_pipeline(
+        creds,
+        listar_pagina=lambda service, tok: service.courses().courseWorkMaterials().list(
+            courseId=course_id, pageToken=tok, pageSize=100,
+            fields="nextPageToken,courseWorkMaterial(id,title)",
+        ).execute(num_retries=5),
+        montar_delete=lambda service, mat_id: service.courses().courseWorkMaterials().delete(
+            courseId=course_id, id=mat_id
+        ),
+        extrair_itens=lambda res: [
+            (f"{m.get('title', '(sem título)')} (id={m['id']})", m["id"])
+            for m in res.get("courseWorkMaterial", [])
+        ],
+        rotulo=f"materiais do curso {course_id}",
+    )
+
+    log.info("Total de materiais deletados no curso %s: %s", course_id, total)
+    return total
+
+
+def deletar_coursework(creds: Credentials, course_id: str) -> int:
+    """
+    Deleta TODOS os courseWork (tarefas, trabalhos) de um curso, via
+    pipeline de paginação + lotes de até 50 deletes por requisição HTTPS.
+    Retorna quantidade apagada.
+    """
+    log.debug("Listando TAREFAS (courseWork) do curso %s...", course_id)
+
+    total = _deletar_pipeline(
+        creds,
+        listar_pagina=lambda service, tok: service.courses().courseWork().list(
+            courseId=course_id, pageToken=tok, pageSize=100,
+            fields="nextPageToken,courseWork(id,title)",
+        ).execute(num_retries=5),
+        montar_delete=lambda service, work_id: service.courses().courseWork().delete(
+            courseId=course_id, id=work_id
+        ),
+        extrair_itens=lambda res: [
+            (f"{w.get('title', '(sem título)')} (id={w['id']})", w["id"])
+            for w in res.get("courseWork", [])
+        ],
+        rotulo=f"courseWork do curso {course_id}",
+    )
+
+    log.info("Total de tarefas deletadas no curso %s: %s", course_id, total)
     return total
 
 
@@ -203,16 +416,31 @@ def deletar_coursework(service: Any, course_id: str) -> int:
 # 4) PIPELINE PRINCIPAL
 # ============================================================
 
+def _limpar_curso(creds: Credentials, course_id: str, nome: str) -> None:
+    """
+    Remove materiais e tarefas de um curso. Roda em uma thread do pool,
+    com o serviço próprio da thread.
+    """
+    log.info("====== Curso: %s (id=%s) ======", nome, course_id)
+    deletar_materiais(creds, course_id)
+    deletar_coursework(creds, course_id)
+
+
 def main():
     print("============================================")
     print(" APAGAR MATERIAIS E TAREFAS DOS CURSOS ")
     print("============================================")
 
-    service = get_classroom_service()
+    creds = get_credentials()
+    service = _service_da_thread(creds)
 
     # 1) Lista todos os cursos (ativos + arquivados)
     cursos = listar_cursos(service)
 
+    # Índice id -> nome montado uma vez: evita varrer a lista de cursos
+    # a cada lookup de nome (O(N·M) vira O(1) por id)
+    nome_por_id = {c["id"]: c["name"] for c in cursos}
+
     # 2) DEFINIR QUAIS CURSOS LIMPAR
     #
     # a) Para limpar TODOS os cursos listados:
@@ -226,23 +454,23 @@ def main():
 
     print("\nCursos que terão TODOS os materiais e tarefas removidos:")
     for cid in course_ids:
-        nome = next((c["name"] for c in cursos if c["id"] == cid), cid)
-        print(f"- {cid} | {nome}")
+        print(f"- {cid} | {nome_por_id.get(cid, cid)}")
 
     confirm = input("\nDIGITE 'APAGAR_TUDO' para confirmar a remoção de MATERIAIS + TAREFAS desses cursos: ").strip()
     if confirm != "APAGAR_TUDO":
         print("Operação cancelada pelo usuário.")
         return
 
-    # 3) Limpa curso a curso
-    for cid in course_ids:
-        nome = next((c["name"] for c in cursos if c["id"] == cid), cid)
-        print("\n======================================")
-        print(f"Curso: {nome} (id={cid})")
-        print("Removendo materiais...")
-        deletar_materiais(service, cid)
-        print("Removendo tarefas...")
-        deletar_coursework(service, cid)
+    # 3) Limpa os cursos em paralelo: as limpezas são independentes entre
+    # si, então o tempo total tende ao do curso mais cheio em vez da soma.
+    with ThreadPoolExecutor(max_workers=COURSE_WORKERS) as executor:
+        futures = [
+            executor.submit(_limpar_curso, creds, cid, nome_por_id.get(cid, cid))
+            for cid in course_ids
+        ]
+        # .result() propaga qualquer exceção das threads
+        for future in futures:
+            future.result()
 
     print("\n==============================================")
     print("===== LIMPEZA DE MATERIAIS E TAREFAS CONCLUÍDA ========")
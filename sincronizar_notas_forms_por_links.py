@@ -5,17 +5,25 @@ from __future__ import annotations
 sincronizar_notas_forms_por_links.py - COM SHEET_ID FIXO
 """
 
+import logging
 import os
 import sys
 import re
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor, as_completed
+from itertools import chain
 from typing import Dict, Any, List, Optional
 
+import httplib2
+import google_auth_httplib2
 from googleapiclient.discovery import build
 from googleapiclient.errors import HttpError
 from google.oauth2.credentials import Credentials
 from google_auth_oauthlib.flow import InstalledAppFlow
 from google.auth.transport.requests import Request
 
+from classroom_common import executar_batch_com_backoff
+
 # ------------------------------------------------------------
 # CONFIG GOOGLE
 # ------------------------------------------------------------
@@ -38,6 +46,16 @@ SCOPES = [
 CREDENTIALS_FILE = "credentials.json"
 TOKEN_FILE = "token.json"
 
+# Um StreamHandler único no stdout: as linhas por aluno viram log.debug
+# (formatação lazy via %s, custo zero quando o nível é INFO) e só os
+# resumos saem por padrão. SINCRONIZACAO_DEBUG=1 religa o detalhe.
+logging.basicConfig(
+    level=logging.DEBUG if os.environ.get("SINCRONIZACAO_DEBUG") else logging.INFO,
+    format="%(message)s",
+    stream=sys.stdout,
+)
+log = logging.getLogger(__name__)
+
 # ====================================================================
 # CONFIGURAÇÃO DE ID FIXO
 # 
@@ -46,12 +64,72 @@ TOKEN_FILE = "token.json"
 # ====================================================================
 SHEET_ID_PADRAO = "1PaPwGxEVYPsLxetchqeD4WYxpn-vV8xlTMHKz6nE8uI"
 
+# Quantos courseWorks são sincronizados em paralelo. Cada um é independente
+# (paginação de submissões + lotes de PATCH) e passa a maior parte do tempo
+# esperando rede, então 8 threads se sobrepõem bem sem estourar a quota.
+CW_WORKERS = 8
+
+# httplib2.Http não é thread-safe: cada thread de sincronização usa o seu
+# próprio serviço do Classroom, criado sob demanda e reutilizado.
+_thread_local = threading.local()
+
+
+def _http_da_thread(creds):
+    http = getattr(_thread_local, "http", None)
+    if http is None:
+        http = google_auth_httplib2.AuthorizedHttp(creds, http=httplib2.Http(timeout=30))
+        _thread_local.http = http
+    return http
+
+
+def _classroom_service_da_thread(creds):
+    service = getattr(_thread_local, "classroom_service", None)
+    if service is None:
+        service = build("classroom", "v1", http=_http_da_thread(creds), static_discovery=True)
+        _thread_local.classroom_service = service
+    return service
+
+
+def _forms_service_da_thread(creds):
+    service = getattr(_thread_local, "forms_service", None)
+    if service is None:
+        service = build("forms", "v1", http=_http_da_thread(creds), static_discovery=True)
+        _thread_local.forms_service = service
+    return service
+
+
+def _sheets_service_da_thread(creds):
+    service = getattr(_thread_local, "sheets_service", None)
+    if service is None:
+        service = build("sheets", "v4", http=_http_da_thread(creds), static_discovery=True)
+        _thread_local.sheets_service = service
+    return service
+
+
+# Caches compartilhados entre as threads de sincronização: cada Planilha
+# única é lida UMA vez (mesmo que vários courseWorks apontem para ela) e
+# cada Form tem seu linkedSheetId resolvido uma vez. O lock protege só o
+# acesso aos dicts; leituras de rede acontecem FORA dele (_notas_cache
+# guarda um Future de reserva enquanto a leitura está em andamento).
+_notas_cache: Dict[str, Any] = {}
+_form_sheet_cache: Dict[str, Optional[str]] = {}
+_cache_lock = threading.Lock()
+
+
+# Credenciais já resolvidas neste processo (warm start de chamadas
+# repetidas não relê o token.json)
+_CACHED_CREDS: Optional[Credentials] = None
+
 
 def get_credentials():
     """
     Carrega o token.json com os SCOPES corretos.
     Se o token não existir ou os escopos mudaram, refaz a autorização.
     """
+    global _CACHED_CREDS
+    if _CACHED_CREDS is not None and _CACHED_CREDS.valid:
+        return _CACHED_CREDS
+
     creds = None
     if os.path.exists(TOKEN_FILE):
         creds = Credentials.from_authorized_user_file(TOKEN_FILE, SCOPES)
@@ -69,29 +147,55 @@ def get_credentials():
                 sys.exit(1)
             flow = InstalledAppFlow.from_client_secrets_file(CREDENTIALS_FILE, SCOPES)
             creds = flow.run_local_server(port=0)
-        with open(TOKEN_FILE, "w", encoding="utf-8") as f:
-            f.write(creds.to_json())
+        _salvar_token(creds)
+    _CACHED_CREDS = creds
     return creds
 
 
+def _salvar_token(creds) -> None:
+    """
+    Persiste o token.json apenas se ele mudou, e via arquivo temporário +
+    os.replace: um crash no meio da escrita nunca deixa um token.json
+    truncado (o que perderia o refresh token e forçaria novo consentimento).
+    """
+    novo = creds.to_json().encode("utf-8")
+    if os.path.exists(TOKEN_FILE):
+        with open(TOKEN_FILE, "rb") as f:
+            if f.read() == novo:
+                return  # nada mudou; poupa a escrita + fsync
+    tmp = TOKEN_FILE + ".tmp"
+    with open(tmp, "wb") as f:
+        f.write(novo)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, TOKEN_FILE)
+
+
 # ------------------------------------------------------------
 # CLASSROOM – ESCOLHER TURMA
 # ------------------------------------------------------------
 def escolher_turma(classroom_service) -> Dict[str, Any]:
-    cursos: List[Dict[str, Any]] = []
+    # Acumula as páginas e achata no final: uma alocação contígua única,
+    # em vez de realocações do extend a cada página.
+    paginas: List[List[Dict[str, Any]]] = []
     page_token = None
 
     while True:
         resp = classroom_service.courses().list(
             pageSize=100,
             courseStates=["ACTIVE"],
-            pageToken=page_token
-        ).execute()
-        cursos.extend(resp.get("courses", []))
+            pageToken=page_token,
+            # Máscara de resposta parcial: só os campos que o menu usa,
+            # em vez do recurso Course inteiro por turma.
+            fields="nextPageToken,courses(id,name)"
+        ).execute(num_retries=5)
+        paginas.append(resp.get("courses", []))
         page_token = resp.get("nextPageToken")
         if not page_token:
             break
 
+    cursos = list(chain.from_iterable(paginas))
+
     if not cursos:
         print("Nenhuma turma ativa encontrada.")
         sys.exit(0)
@@ -135,8 +239,10 @@ def mapear_alunos_por_email(classroom_service, course_id: str) -> Dict[str, str]
     while True:
         resp = classroom_service.courses().students().list(
             courseId=course_id,
-            pageToken=page_token
-        ).execute()
+            pageToken=page_token,
+            pageSize=100,
+            fields="nextPageToken,students(userId,profile(emailAddress,name/fullName))"
+        ).execute(num_retries=5)
 
         for st in resp.get("students", []):
             total_alunos_api += 1
@@ -148,7 +254,7 @@ def mapear_alunos_por_email(classroom_service, course_id: str) -> Dict[str, str]
                 mapa[email.strip().lower()] = user_id
             elif not email and user_id:
                 # Aviso sobre o aluno Elaine Martinez
-                print(f"ATENÇÃO: Aluno '{perfil.get('name', {}).get('fullName', 'Desconhecido')}' (ID: {user_id}) ignorado - EMAIL OCULTO pela API.")
+                log.warning("ATENÇÃO: Aluno '%s' (ID: %s) ignorado - EMAIL OCULTO pela API.", perfil.get("name", {}).get("fullName", "Desconhecido"), user_id)
 
 
         page_token = resp.get("nextPageToken")
@@ -156,13 +262,17 @@ def mapear_alunos_por_email(classroom_service, course_id: str) -> Dict[str, str]
             break
 
     # 2. Adicionar alunos do mapa de fallback
+    # Set de ids montado uma vez: o teste de pertencimento fica O(1),
+    # em vez de varrer mapa.values() (O(N)) por entrada do fallback.
+    ids_existentes = set(mapa.values())
     for email, user_id in FALLBACK_EMAIL_MAP.items():
-        if user_id not in mapa.values():
+        if user_id not in ids_existentes:
              mapa[email.strip().lower()] = user_id
-             print(f"✅ Adicionado FALLBACK: {email} (ID: {user_id})")
+             ids_existentes.add(user_id)
+             log.debug("✅ Adicionado FALLBACK: %s (ID: %s)", email, user_id)
 
-    print(f"\nAlunos totais encontrados pela API: {total_alunos_api}")
-    print(f"Alunos mapeados por e-mail (para sincronização): {len(mapa)}")
+    log.info("\nAlunos totais encontrados pela API: %s", total_alunos_api)
+    log.info("Alunos mapeados por e-mail (para sincronização): %s", len(mapa))
     return mapa
 
 
@@ -184,8 +294,12 @@ def mapear_submissoes_por_user(
         resp = classroom_service.courses().courseWork().studentSubmissions().list(
             courseId=course_id,
             courseWorkId=coursework_id,
-            pageToken=page_token
-        ).execute()
+            pageToken=page_token,
+            pageSize=100,
+            # Só id/userId são usados no mapa; o resto da submissão
+            # (anexos, histórico etc.) é o grosso do payload.
+            fields="nextPageToken,studentSubmissions(id,userId)"
+        ).execute(num_retries=5)
 
         for sub in resp.get("studentSubmissions", []):
             user_id = sub.get("userId")
@@ -196,7 +310,7 @@ def mapear_submissoes_por_user(
         if not page_token:
             break
 
-    print(f"  Submissões carregadas: {len(mapa)} (userId -> studentSubmission)")
+    log.info("  Submissões carregadas: %s (userId -> studentSubmission)", len(mapa))
     return mapa
 
 
@@ -210,39 +324,59 @@ def mapear_notas_do_forms_via_sheets(sheets_service, sheet_id: str) -> Dict[str,
     """
     notas: Dict[str, float] = {}
 
-    # Lendo apenas o cabeçalho para descobrir a posição das colunas
-    cabecalho = sheets_service.spreadsheets().values().get(
+    # Um único batchGet traz o cabeçalho e, especulativamente, as duas
+    # colunas de dados do layout padrão do Forms (B = e-mail, C = nota).
+    # Pedir só as colunas usadas encolhe o payload em ~13× frente ao
+    # A2:Z de 26 colunas; se o cabeçalho revelar outras posições, um
+    # segundo batchGet estreito busca as colunas certas.
+    resp = sheets_service.spreadsheets().values().batchGet(
         spreadsheetId=sheet_id,
-        range='A1:Z1' # Assume que as colunas estão em A a Z na linha 1
-    ).execute().get('values', [[]])[0]
+        ranges=['A1:Z1', 'B2:B', 'C2:C'],
+    ).execute(num_retries=5)
+    value_ranges = resp.get('valueRanges', [{}, {}, {}])
+
+    cabecalho = value_ranges[0].get('values', [[]])[0]
     
     # Tenta localizar as colunas pelo nome. Caso contrário, assume colunas 2 e 3 (índices 1 e 2)
-    try:
-        email_col_idx = cabecalho.index('Nome de usuário')
-        score_col_idx = cabecalho.index('Pontuação total')
-        print(f"INFO: Colunas 'Nome de usuário' (índice {email_col_idx}) e 'Pontuação total' (índice {score_col_idx}) localizadas pelo nome.")
-    except ValueError:
-        print("\nAVISO: Não foi possível localizar as colunas 'Nome de usuário' e 'Pontuação total' pelo nome.")
-        print("Assumindo que estão nas colunas B (índice 1) e C (índice 2) da Planilha.")
+    # Índice nome->posição montado uma vez, com nomes normalizados
+    # (strip + lower): dois lookups O(1) em vez de dois .index() O(N), e
+    # cabeçalhos com espaços sobrando ou caixa diferente continuam batendo.
+    hdr = {h.strip().lower(): i for i, h in enumerate(cabecalho)}
+    email_col_idx = hdr.get('nome de usuário')
+    score_col_idx = hdr.get('pontuação total')
+    if email_col_idx is not None and score_col_idx is not None:
+        log.info("INFO: Colunas 'Nome de usuário' (índice %s) e 'Pontuação total' (índice %s) localizadas pelo nome.", email_col_idx, score_col_idx)
+    else:
+        log.warning("\nAVISO: Não foi possível localizar as colunas 'Nome de usuário' e 'Pontuação total' pelo nome.")
+        log.warning("Assumindo que estão nas colunas B (índice 1) e C (índice 2) da Planilha.")
         email_col_idx = 1
         score_col_idx = 2
         # Verificação básica para evitar IndexError se a planilha for muito pequena
         if len(cabecalho) < 3:
-             print("ERRO: A planilha é muito pequena. Colunas B e C não existem.")
+             log.error("ERRO: A planilha é muito pequena. Colunas B e C não existem.")
              return {}
     
-    # Lendo todas as linhas de dados (a partir da linha 2)
-    range_data = sheets_service.spreadsheets().values().get(
-        spreadsheetId=sheet_id,
-        range='A2:Z' # Assume que os dados começam na linha 2
-    ).execute().get('values', [])
+    if (email_col_idx, score_col_idx) == (1, 2):
+        # Layout padrão: as colunas já vieram no primeiro batchGet
+        col_emails = value_ranges[1].get('values', [])
+        col_scores = value_ranges[2].get('values', [])
+    else:
+        letra_email = chr(ord('A') + email_col_idx)
+        letra_score = chr(ord('A') + score_col_idx)
+        resp = sheets_service.spreadsheets().values().batchGet(
+            spreadsheetId=sheet_id,
+            ranges=[f'{letra_email}2:{letra_email}', f'{letra_score}2:{letra_score}'],
+        ).execute(num_retries=5)
+        value_ranges = resp.get('valueRanges', [{}, {}])
+        col_emails = value_ranges[0].get('values', [])
+        col_scores = value_ranges[1].get('values', [])
     
-    print(f"\n  Lendo {len(range_data)} respostas na Planilha vinculada...")
+    log.info("\n  Lendo %s respostas na Planilha vinculada...", len(col_emails))
 
-    for row in range_data:
+    for linha_email, linha_score in zip(col_emails, col_scores):
         try:
-            email = row[email_col_idx].strip()
-            score_str = row[score_col_idx].split('/')[0].strip() # Pega só a nota (ex: "1.00 / 10" -> "1.00")
+            email = linha_email[0].strip()
+            score_str = linha_score[0].split('/')[0].strip() # Pega só a nota (ex: "1.00 / 10" -> "1.00")
             total_score = float(score_str)
         except (IndexError, ValueError):
             # Ignora linhas mal formatadas ou sem dados nas colunas esperadas
@@ -254,22 +388,10 @@ def mapear_notas_do_forms_via_sheets(sheets_service, sheet_id: str) -> Dict[str,
         if antiga is None or total_score > antiga:
             notas[email_key] = total_score
 
-    print(f"  Respostas com nota: {len(notas)} (email -> totalScore)")
+    log.info("  Respostas com nota: %s (email -> totalScore)", len(notas))
     return notas
 
 
-# ------------------------------------------------------------
-# CLASSROOM – BUSCAR MAX_POINTS DA TAREFA
-# ------------------------------------------------------------
-def obter_max_points_do_coursework(coursework: Dict[str, Any]) -> Optional[float]:
-    mp = coursework.get("maxPoints")
-    if mp is not None:
-        print(f"  maxPoints da tarefa: {mp}")
-    else:
-        print("  Aviso: tarefa sem maxPoints definido.")
-    return mp
-
-
 # ------------------------------------------------------------
 # CLASSROOM – APLICAR NOTAS
 # ------------------------------------------------------------
@@ -277,26 +399,43 @@ def aplicar_notas(
     classroom_service,
     course_id: str,
     coursework_id: str,
-    mapa_email_para_user: Dict[str, str],
+    user_to_email: Dict[str, str],
     mapa_user_para_sub: Dict[str, Dict[str, Any]],
     notas_forms: Dict[str, float],
     max_points: Optional[float],
 ):
     sucesso = 0
     ignorados_sem_aluno = 0
-    ignorados_sem_sub = 0
-
-    for email_key, nota in notas_forms.items():
-        user_id = mapa_email_para_user.get(email_key)
-        if not user_id:
-            print(f"    [IGNORADO] Sem aluno no Classroom com e-mail: {email_key}")
+    sem_nota_no_forms = 0
+
+    # Os PATCHes vão em lotes (BatchHttpRequest): N round-trips HTTPS
+    # sequenciais viram ~1 por lote de 50 notas. Rodadas e sub-requisições
+    # com 429/5xx — esperadas com 8 threads de tarefa despachando lotes —
+    # são reenviadas com backoff pelo helper (o PATCH com updateMask é
+    # idempotente); o callback só vê resultados finais.
+    def _on_patch_done(request_id, response, exception):
+        nonlocal sucesso
+        if exception is not None:
+            log.error("    [ERRO] Aplicando nota para %s: %s", request_id, exception)
+            return
+        sucesso += 1
+
+    requisicoes = []
+
+    # Itera as submissões reais da tarefa (não os respondentes do Forms):
+    # e-mails estranhos à turma nunca entram no laço, e cada iteração faz
+    # só dois gets de dicionário, sem print por aluno ignorado.
+    for user_id, sub in mapa_user_para_sub.items():
+        email_key = user_to_email.get(user_id)
+        if not email_key:
+            # Aluno com e-mail oculto pela API e fora do fallback
             ignorados_sem_aluno += 1
             continue
 
-        sub = mapa_user_para_sub.get(user_id)
-        if not sub:
-            print(f"    [IGNORADO] Aluno {email_key} (userId {user_id}) não tem submissão para essa tarefa.")
-            ignorados_sem_sub += 1
+        nota = notas_forms.get(email_key)
+        if nota is None:
+            # Aluno sem resposta no Forms: não há o que lançar
+            sem_nota_no_forms += 1
             continue
 
         sub_id = sub["id"]
@@ -310,29 +449,32 @@ def aplicar_notas(
             "assignedGrade": nota_aplicada,
         }
 
-        try:
+        requisicoes.append((
+            f"{email_key} (submission {sub_id})",
             classroom_service.courses().courseWork().studentSubmissions().patch(
                 courseId=course_id,
                 courseWorkId=coursework_id,
                 id=sub_id,
                 body=body,
                 updateMask="draftGrade,assignedGrade",
-            ).execute()
-            print(f"    [OK] {email_key} -> nota {nota_aplicada} (submission {sub_id})")
-            sucesso += 1
-        except HttpError as e:
-            print(f"    [ERRO] Aplicando nota para {email_key} (submission {sub_id}): {e}")
+            ),
+        ))
+
+    executar_batch_com_backoff(classroom_service, requisicoes, _on_patch_done)
 
-    print("  Resumo da tarefa:")
-    print(f"    Notas aplicadas com sucesso : {sucesso}")
-    print(f"    Ignorados (sem aluno)       : {ignorados_sem_aluno}")
-    print(f"    Ignorados (sem submissão)   : {ignorados_sem_sub}")
+    log.info("  Resumo da tarefa:")
+    log.info("    Notas aplicadas com sucesso : %s", sucesso)
+    log.info("    Ignorados (sem e-mail)       : %s", ignorados_sem_aluno)
+    log.info("    Sem resposta no Forms       : %s", sem_nota_no_forms)
 
 
 # ------------------------------------------------------------
 # EXTRair formId A PARTIR DO LINK
 # ------------------------------------------------------------
-FORM_URL_RE = re.compile(r"/forms/d/(?:e/)?([a-zA-Z0-9_-]+)/")
+# Host ancorado no padrão: URLs que não são do Forms são rejeitadas pelo
+# próprio motor de regex (otimização de prefixo literal), dispensando o
+# pré-teste "docs.google.com/forms" in url que varria a string duas vezes.
+FORM_URL_RE = re.compile(r"https?://docs\.google\.com/forms/d/(?:e/)?([A-Za-z0-9_-]+)/")
 
 
 def extrair_form_id_de_link_material(material: Dict[str, Any]) -> Optional[str]:
@@ -343,11 +485,7 @@ def extrair_form_id_de_link_material(material: Dict[str, Any]) -> Optional[str]:
     if not link:
         return None
 
-    url = link.get("url", "")
-    if "docs.google.com/forms" not in url:
-        return None
-
-    m = FORM_URL_RE.search(url)
+    m = FORM_URL_RE.search(link.get("url", ""))
     if not m:
         return None
 
@@ -358,35 +496,150 @@ def extrair_form_id_de_link_material(material: Dict[str, Any]) -> Optional[str]:
 # CLASSROOM – LISTAR TODOS OS COURSEWORK
 # ------------------------------------------------------------
 def listar_courseworks(classroom_service, course_id: str) -> List[Dict[str, Any]]:
-    works: List[Dict[str, Any]] = []
+    paginas: List[List[Dict[str, Any]]] = []
     page_token = None
 
     while True:
         resp = classroom_service.courses().courseWork().list(
             courseId=course_id,
             pageToken=page_token,
-            pageSize=100
-        ).execute()
+            pageSize=100,
+            fields="nextPageToken,courseWork(id,title,workType,maxPoints,materials)"
+        ).execute(num_retries=5)
 
-        works.extend(resp.get("courseWork", []))
+        paginas.append(resp.get("courseWork", []))
         page_token = resp.get("nextPageToken")
         if not page_token:
             break
 
-    print(f"\nCourseWorks encontrados na turma: {len(works)}")
+    works = list(chain.from_iterable(paginas))
+
+    log.info("\nCourseWorks encontrados na turma: %s", len(works))
     return works
 
 
 # ------------------------------------------------------------
-# CLASSROOM – BUSCAR MAX_POINTS DA TAREFA
+# RESOLVER A PLANILHA DE CADA COURSEWORK (com caches)
 # ------------------------------------------------------------
-def obter_max_points_do_coursework(coursework: Dict[str, Any]) -> Optional[float]:
-    mp = coursework.get("maxPoints")
-    if mp is not None:
-        print(f"  maxPoints da tarefa: {mp}")
-    else:
-        print("  Aviso: tarefa sem maxPoints definido.")
-    return mp
+def _resolver_sheet_id_do_coursework(creds, cw: Dict[str, Any], sheet_id_padrao: str) -> str:
+    """
+    Se o courseWork tiver um material com link de Google Forms, resolve a
+    Planilha de respostas vinculada a esse Form (linkedSheetId); senão,
+    usa a Planilha padrão. O linkedSheetId de cada Form é cacheado.
+    """
+    for material in cw.get("materials", []):
+        form_id = extrair_form_id_de_link_material(material)
+        if not form_id:
+            continue
+
+        with _cache_lock:
+            ja_resolvido = form_id in _form_sheet_cache
+            linked = _form_sheet_cache.get(form_id)
+        if not ja_resolvido:
+            try:
+                forms_service = _forms_service_da_thread(creds)
+                linked = forms_service.forms().get(
+                    formId=form_id,
+                    fields="linkedSheetId",
+                ).execute(num_retries=5).get("linkedSheetId")
+            except HttpError as e:
+                log.warning("Não foi possível resolver a Planilha do Form %s: %s", form_id, e)
+                linked = None
+            with _cache_lock:
+                _form_sheet_cache[form_id] = linked
+
+        if linked:
+            return linked
+
+    return sheet_id_padrao
+
+
+def _notas_da_planilha(creds, sheet_id: str) -> Dict[str, float]:
+    """
+    Notas de uma Planilha, lidas no máximo uma vez por execução: vários
+    courseWorks apontando para a mesma Planilha compartilham a leitura.
+
+    O lock é segurado só para consultar/reservar o cache; o batchGet roda
+    fora dele, então Planilhas distintas são lidas em paralelo e os
+    lookups do _form_sheet_cache não ficam presos atrás de uma leitura.
+    A reserva é um Future por Planilha: a primeira thread lê, as demais
+    esperam o result() dela.
+    """
+    with _cache_lock:
+        entrada = _notas_cache.get(sheet_id)
+        if entrada is None:
+            reserva: Future = Future()
+            _notas_cache[sheet_id] = reserva
+
+    if entrada is not None:
+        if isinstance(entrada, Future):
+            return entrada.result()
+        return entrada
+
+    try:
+        notas = mapear_notas_do_forms_via_sheets(
+            _sheets_service_da_thread(creds), sheet_id
+        )
+    except BaseException as e:
+        # Desfaz a reserva e propaga também para as threads em espera
+        with _cache_lock:
+            _notas_cache.pop(sheet_id, None)
+        reserva.set_exception(e)
+        raise
+
+    with _cache_lock:
+        _notas_cache[sheet_id] = notas
+    reserva.set_result(notas)
+    return notas
+
+
+# ------------------------------------------------------------
+# SINCRONIZAR UM COURSEWORK (roda em thread própria)
+# ------------------------------------------------------------
+def _sincronizar_coursework(
+    creds,
+    course_id: str,
+    cw: Dict[str, Any],
+    sheet_id_padrao: str,
+    user_to_email: Dict[str, str],
+):
+    cw_id = cw["id"]
+    titulo = cw.get("title", "(sem título)")
+    work_type = cw.get("workType", "")
+    log.info("\n=== TAREFA: %s (ID %s, workType=%s) ===", titulo, cw_id, work_type)
+
+    # Planilha do próprio courseWork (via link de Forms nos materiais),
+    # caindo para a Planilha padrão quando não há Form vinculado.
+    sheet_id = _resolver_sheet_id_do_coursework(creds, cw, sheet_id_padrao)
+    log.info("  Sincronizando notas da Planilha %s com a tarefa %s...", sheet_id, cw_id)
+
+    notas_forms = _notas_da_planilha(creds, sheet_id)
+    if not notas_forms:
+        log.info("  Planilha %s sem notas. Pulando a tarefa %s.", sheet_id, cw_id)
+        return
+
+    classroom_service = _classroom_service_da_thread(creds)
+
+    mapa_user_para_sub = mapear_submissoes_por_user(
+        classroom_service, course_id, cw_id
+    )
+    if not mapa_user_para_sub:
+        log.info("  Nenhuma submissão para essa tarefa no Classroom. Pulando.")
+        return
+
+    # maxPoints já veio na máscara fields de listar_courseworks
+    max_points = cw.get("maxPoints")
+    if max_points is None:
+        log.warning("  Aviso: tarefa %s sem maxPoints definido.", cw_id)
+    aplicar_notas(
+        classroom_service,
+        course_id,
+        cw_id,
+        user_to_email,
+        mapa_user_para_sub,
+        notas_forms,
+        max_points,
+    )
 
 
 # ------------------------------------------------------------
@@ -397,8 +650,13 @@ def main():
     print("Escopos do token carregado:")
     print(creds.scopes)
 
-    classroom_service = build("classroom", "v1", credentials=creds)
-    sheets_service = build("sheets", "v4", credentials=creds) 
+    # Um único Http autenticado compartilhado pelos serviços: as chamadas a
+    # *.googleapis.com reutilizam a mesma conexão TLS com keep-alive, em
+    # vez de cada serviço abrir o seu próprio httplib2.Http.
+    # static_discovery usa os discovery documents embutidos no pacote, sem
+    # um fetch HTTPS por serviço na inicialização.
+    http = google_auth_httplib2.AuthorizedHttp(creds, http=httplib2.Http(timeout=30))
+    classroom_service = build("classroom", "v1", http=http, static_discovery=True)
 
     # Escolher turma
     curso = escolher_turma(classroom_service)
@@ -411,6 +669,10 @@ def main():
         print("Nenhum aluno mapeado. O mapa de emergência está vazio ou incorreto.")
         sys.exit(0)
 
+    # Mapa inverso userId -> email, montado uma vez para a turma inteira:
+    # aplicar_notas itera as submissões e resolve o e-mail por lookup O(1).
+    user_to_email = {uid: em for em, uid in mapa_email_para_user.items()}
+
     # Listar todos os courseWorks
     works = listar_courseworks(classroom_service, course_id)
     if not works:
@@ -429,45 +691,38 @@ def main():
     else:
          print(f"Planilha de sincronização configurada: {sheet_id}")
 
-
-    # Para cada courseWork, procurar Forms vinculados via LINK e sincronizar
-    for cw in works:
-        cw_id = cw["id"]
-        titulo = cw.get("title", "(sem título)")
-        work_type = cw.get("workType", "")
-        print(f"\n=== TAREFA: {titulo} (ID {cw_id}, workType={work_type}) ===")
-
-        # Assumindo que a única Planilha de respostas é a que foi configurada.
-        print(f"  Tentando sincronizar notas usando a Planilha {sheet_id} com a tarefa {cw_id}...")
-
-        # CHAMADA CORRIGIDA: Usando Sheets API
-        try:
-            notas_forms = mapear_notas_do_forms_via_sheets(sheets_service, sheet_id)
-        except HttpError as e:
-            print(f"  ERRO: Falha ao acessar Planilha {sheet_id}. Verifique se o ID está correto ou se a Planilha está compartilhada com a sua conta. Erro: {e}")
-            continue
-
-        if not notas_forms:
-            print("  Nenhuma nota encontrada na Planilha (vazia ou colunas incorretas). Pulando.")
-            continue
-
-        mapa_user_para_sub = mapear_submissoes_por_user(
-            classroom_service, course_id, cw_id
-        )
-        if not mapa_user_para_sub:
-            print("  Nenhuma submissão para essa tarefa no Classroom. Pulando.")
-            continue
-
-        max_points = obter_max_points_do_coursework(cw)
-        aplicar_notas(
-            classroom_service,
-            course_id,
-            cw_id,
-            mapa_email_para_user,
-            mapa_user_para_sub,
-            notas_forms,
-            max_points,
-        )
+    # Pré-carrega a Planilha padrão no cache (valida acesso/ID cedo);
+    # courseWorks com Forms próprios resolvem as suas Planilhas depois,
+    # cada uma lida uma única vez para a execução inteira.
+    try:
+        notas_padrao = _notas_da_planilha(creds, sheet_id)
+    except HttpError as e:
+        print(f"ERRO: Falha ao acessar Planilha {sheet_id}. Verifique se o ID está correto ou se a Planilha está compartilhada com a sua conta. Erro: {e}")
+        sys.exit(1)
+
+    if not notas_padrao:
+        log.warning("Planilha padrão sem notas; só tarefas com Forms próprios terão o que sincronizar.")
+
+    # Cada courseWork é sincronizado por uma thread própria: a paginação
+    # de submissões e os lotes de PATCH de um não bloqueiam os demais.
+    with ThreadPoolExecutor(max_workers=CW_WORKERS) as executor:
+        futuros = {
+            executor.submit(
+                _sincronizar_coursework,
+                creds,
+                course_id,
+                cw,
+                sheet_id,
+                user_to_email,
+            ): cw
+            for cw in works
+        }
+        for futuro in as_completed(futuros):
+            cw = futuros[futuro]
+            try:
+                futuro.result()
+            except Exception as e:
+                log.error("[ERRO] Falha ao sincronizar a tarefa '%s': %s", cw.get("title", cw["id"]), e)
 
     print("\nProcesso de sincronização concluído para TODAS as tarefas com Forms (por link) da turma.")
 
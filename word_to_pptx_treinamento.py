@@ -11,7 +11,10 @@ word_to_pptx_treinamento.py (VERSÃO 6.0 - Preparado para VBA)
 """
 
 import argparse
+import os
 import sys
+from io import BytesIO
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from pathlib import Path
 from typing import Optional
 
@@ -32,6 +35,12 @@ FONT_NAME = "Arial"
 MAX_BULLETS = 15  # Máximo de bullets por slide
 LOGO_SIZE = Inches(1.0)     
 
+# Prefixos de estilo de título (Word em inglês e em português). Em forma
+# de tupla, um único startswith testa os dois em C, sem o par de
+# chamadas encadeadas com `or` por parágrafo.
+H1_PREFIXES = ("Heading 1", "Título 1")
+H2_PREFIXES = ("Heading 2", "Título 2")
+
 
 # =========================
 # FUNÇÕES DE TEMA
@@ -52,18 +61,23 @@ def add_top_banner(slide, slide_width) -> None:
     pass
 
 
-def add_logo(slide, logo_path: Optional[Path], slide_width, slide_height) -> None:
+def add_logo(slide, logo_stream: Optional[BytesIO], slide_width, slide_height) -> None:
     """
     Adiciona o logo no canto inferior direito do slide.
+
+    Recebe o PNG/JPG já carregado em memória (BytesIO): o arquivo é lido
+    do disco uma única vez por apresentação, e o python-pptx reconhece os
+    bytes idênticos e compartilha uma só parte de imagem no PPTX.
     """
-    if not logo_path or not logo_path.exists():
+    if logo_stream is None:
         return
 
     # Posição: Canto inferior direito, com margem de 0.3 polegadas (0.76 cm)
     left = slide_width - LOGO_SIZE - Inches(0.3)
     top = slide_height - LOGO_SIZE - Inches(0.3)
 
-    slide.shapes.add_picture(str(logo_path), left, top, width=LOGO_SIZE, height=LOGO_SIZE)
+    logo_stream.seek(0)
+    slide.shapes.add_picture(logo_stream, left, top, width=LOGO_SIZE, height=LOGO_SIZE)
 
 
 def add_formatted_title(body_shape, text: str) -> None:
@@ -126,17 +140,17 @@ def add_slide_numbers(pres: Presentation) -> None:
     if total == 0:
         return
 
-    width = pres.slide_width
     height = pres.slide_height
 
-    for idx, slide in enumerate(pres.slides, start=1):
-        tx_width = Inches(1.8)
-        tx_height = Inches(0.5)
-        
-        # Posição: no rodapé, no canto esquerdo
-        left = Inches(0.3)
-        top = height - tx_height - Inches(0.1) 
+    # Caixa e posição são as mesmas em todos os slides: calculadas uma
+    # vez aqui fora, em vez de recriar as quatro medidas por iteração.
+    tx_width = Inches(1.8)
+    tx_height = Inches(0.5)
+    # Posição: no rodapé, no canto esquerdo
+    left = Inches(0.3)
+    top = height - tx_height - Inches(0.1)
 
+    for idx, slide in enumerate(pres.slides, start=1):
         textbox = slide.shapes.add_textbox(left, top, tx_width, tx_height)
         tf = textbox.text_frame
         p = tf.paragraphs[0]
@@ -151,7 +165,7 @@ def add_slide_numbers(pres: Presentation) -> None:
 # CORE: CONVERSÃO DOCX -> PPTX
 # =========================
 def _novo_slide_conteudo(pres: Presentation,
-                         logo_path: Optional[Path],
+                         logo_stream: Optional[BytesIO],
                          slide_width,
                          slide_height,
                          titulo: str) -> tuple:
@@ -164,7 +178,7 @@ def _novo_slide_conteudo(pres: Presentation,
     # 1. Aplica Tema (Fundo, Logo)
     apply_slide_background(slide)
     add_top_banner(slide, slide_width) 
-    add_logo(slide, logo_path, slide_width, slide_height)
+    add_logo(slide, logo_stream, slide_width, slide_height)
     
     # 2. Obtém os Placeholders padrão que o VBA irá ajustar
     title_shape = None
@@ -203,6 +217,12 @@ def create_presentation_from_docx(
     document = Document(str(docx_path))
     pres = Presentation()
 
+    # Logo lido do disco uma vez; o mesmo BytesIO (rebobinado) serve para
+    # todos os slides, em vez de um open+hash do arquivo por slide.
+    logo_stream: Optional[BytesIO] = None
+    if logo_path and logo_path.exists():
+        logo_stream = BytesIO(logo_path.read_bytes())
+
     slide_width = pres.slide_width
     slide_height = pres.slide_height
 
@@ -222,28 +242,28 @@ def create_presentation_from_docx(
         if current_slide is None:
             titulo_modulo = titulo_padrao or docx_path.stem.replace("_", " ").title()
             current_slide, body_shape = _novo_slide_conteudo(
-                pres, logo_path, slide_width, slide_height, titulo_modulo
+                pres, logo_stream, slide_width, slide_height, titulo_modulo
             )
             if body_shape is None:
                 continue
 
         # Heading 1 => novo módulo (novo slide principal)
-        if style_name.startswith("Heading 1") or style_name.startswith("Título 1"):
+        if style_name.startswith(H1_PREFIXES):
             titulo_modulo = text
             bullet_count = 0
             current_slide, body_shape = _novo_slide_conteudo(
-                pres, logo_path, slide_width, slide_height, titulo_modulo
+                pres, logo_stream, slide_width, slide_height, titulo_modulo
             )
 
         if body_shape:
             # Heading 2 => subtítulo em destaque dentro do módulo
-            if style_name.startswith("Heading 2") or style_name.startswith("Título 2"):
+            if style_name.startswith(H2_PREFIXES):
                 # Quebra em continuação se MAX_BULLETS atingido
                 if bullet_count >= MAX_BULLETS:
                     titulo_cont = (titulo_modulo or titulo_padrao or docx_path.stem) + " (continuação)"
                     bullet_count = 0
                     current_slide, body_shape = _novo_slide_conteudo(
-                        pres, logo_path, slide_width, slide_height, titulo_cont
+                        pres, logo_stream, slide_width, slide_height, titulo_cont
                     )
                 
                 if body_shape:
@@ -257,7 +277,7 @@ def create_presentation_from_docx(
                     titulo_cont = (titulo_modulo or titulo_padrao or docx_path.stem) + " (continuação)"
                     bullet_count = 0
                     current_slide, body_shape = _novo_slide_conteudo(
-                        pres, logo_path, slide_width, slide_height, titulo_cont
+                        pres, logo_stream, slide_width, slide_height, titulo_cont
                     )
                 
                 if body_shape:
@@ -268,7 +288,7 @@ def create_presentation_from_docx(
     if len(pres.slides) == 0:
         titulo = titulo_padrao or docx_path.stem.replace("_", " ").title()
         _novo_slide_conteudo(
-            pres, logo_path, slide_width, slide_height, titulo
+            pres, logo_stream, slide_width, slide_height, titulo
         )
 
     # Numeração
@@ -283,6 +303,26 @@ def create_presentation_from_docx(
 # =========================
 # (Mantido o código original)
 
+def _converter_um(docx_file: Path, pasta_base: Path, out_base: Path,
+                  logo: Optional[Path], titulo: Optional[str]) -> None:
+    """
+    Converte um único DOCX (roda em processo filho do pool).
+    """
+    rel = docx_file.relative_to(pasta_base)
+    rel_pptx = rel.with_suffix(".pptx")
+    pptx_destino = out_base / rel_pptx
+    pptx_destino.parent.mkdir(parents=True, exist_ok=True)
+
+    titulo_padrao = titulo or docx_file.stem.replace("_", " ").title()
+
+    create_presentation_from_docx(
+        docx_path=docx_file,
+        pptx_path=pptx_destino,
+        logo_path=logo,
+        titulo_padrao=titulo_padrao
+    )
+
+
 def processar_pasta(pasta_base: Path, logo: Optional[Path], titulo: Optional[str]) -> None:
     pasta_base = pasta_base.resolve()
     out_base = pasta_base.parent / "gerados_pptx"
@@ -295,20 +335,20 @@ def processar_pasta(pasta_base: Path, logo: Optional[Path], titulo: Optional[str
 
     print(f"Encontrados {len(arquivos)} arquivos .docx em {pasta_base} (com subpastas).")
 
-    for docx_file in arquivos:
-        rel = docx_file.relative_to(pasta_base)
-        rel_pptx = rel.with_suffix(".pptx")
-        pptx_destino = out_base / rel_pptx
-        pptx_destino.parent.mkdir(parents=True, exist_ok=True)
-
-        titulo_padrao = titulo or docx_file.stem.replace("_", " ").title()
-
-        create_presentation_from_docx(
-            docx_path=docx_file,
-            pptx_path=pptx_destino,
-            logo_path=logo,
-            titulo_padrao=titulo_padrao
-        )
+    # A conversão é CPU-bound (parse do XML do DOCX + montagem do PPTX) e
+    # cada arquivo é independente: um processo por núcleo contorna o GIL e
+    # converte N arquivos quase N× mais rápido em máquinas multi-core.
+    with ProcessPoolExecutor(max_workers=os.cpu_count()) as executor:
+        futuros = {
+            executor.submit(_converter_um, docx_file, pasta_base, out_base, logo, titulo): docx_file
+            for docx_file in arquivos
+        }
+        for futuro in as_completed(futuros):
+            docx_file = futuros[futuro]
+            try:
+                futuro.result()
+            except Exception as e:
+                print(f"[ERRO] Falha ao converter {docx_file.name}: {e}")
 
     print(f"Apresentações geradas em: {out_base}")
 